@@ -0,0 +1,132 @@
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import ghpi_data
+
+# --- SETTINGS ---
+WINDOW = int(os.environ.get('GHPI_CORR_WINDOW', 8))  # years per rolling correlation
+MAX_LAG = int(os.environ.get('GHPI_CORR_MAX_LAG', 3))  # years of lead / lag either way
+MIN_PAIRS = 5  # fewer overlapping years -> no correlation (NaN)
+
+# --- MACRO ANALYTICS ---
+# GHPI YoY against every macro driver: a lead/lag cross-correlation matrix (driver x lag)
+# and rolling correlations (year x driver). Level series enter as annual % change,
+# inflation as is. Lag k pairs GHPI_YoY in year t with the driver in year t - k, so
+# k > 0 means the driver leads the index.
+#
+# The lag matrix is kept as running sums (n, Σx, Σy, Σxy, Σx², Σy² per driver and lag).
+# When a refresh only appends years to otherwise identical data, only the new pairs are
+# added and only the new rolling windows computed; anything else is a full rebuild.
+DRIVERS = ['GDP_Billion', 'Inflation', 'ASE_Index', 'Permits_Thous', 'FDI_RealEstate_M', 'Mortgages_New_M', 'Transactions_Thous']
+RATE_DRIVERS = {'Inflation'}
+
+
+def _frame(ds):
+    macro = ghpi_data.get_macro(ds=ds).set_index('Year').sort_index()
+    out = pd.DataFrame(index=macro.index.astype('int64'))
+    for col in DRIVERS:
+        values = macro[col].astype('float64')
+        out[col] = values if col in RATE_DRIVERS else values.pct_change() * 100
+    out['GHPI_YoY'] = macro['GHPI_YoY'].astype('float64')
+    return out
+
+
+def _lag_pairs(frame):
+    # y: (lags, years) GHPI_YoY; x: (lags, years, drivers) driver shifted by each lag
+    lags = np.arange(-MAX_LAG, MAX_LAG + 1)
+    y = frame['GHPI_YoY'].to_numpy()
+    x = frame[DRIVERS].to_numpy()
+    n = len(y)
+    xs = np.full((len(lags), n, len(DRIVERS)), np.nan)
+    for i, k in enumerate(lags):
+        if k >= 0:
+            xs[i, k:] = x[:n - k]
+        else:
+            xs[i, :n + k] = x[-k:]
+    # Index of the newest year involved in each pair (t or t - k), for incremental updates
+    newest = np.maximum(np.arange(n)[None, :], np.arange(n)[None, :] - lags[:, None])
+    return lags, np.broadcast_to(y, (len(lags), n)), xs, newest
+
+
+def _pair_sums(y, xs, mask):
+    # Sufficient statistics over the selected pairs, vectorized over lags and drivers
+    y = np.broadcast_to(y[:, :, None], xs.shape)
+    valid = mask[:, :, None] & ~np.isnan(xs) & ~np.isnan(y)
+    x0, y0 = np.where(valid, xs, 0.0), np.where(valid, y, 0.0)
+    return np.stack([valid.sum(axis=1), x0.sum(axis=1), y0.sum(axis=1), (x0 * y0).sum(axis=1), (x0 ** 2).sum(axis=1), (y0 ** 2).sum(axis=1)])
+
+
+def _corr_from_sums(sums):
+    n, sx, sy, sxy, sxx, syy = sums
+    with np.errstate(invalid='ignore', divide='ignore'):
+        cov = sxy - sx * sy / n
+        corr = cov / np.sqrt((sxx - sx ** 2 / n) * (syy - sy ** 2 / n))
+    return np.where(n >= MIN_PAIRS, corr, np.nan)
+
+
+def _rolling(frame):
+    # Year x driver correlation over the trailing WINDOW years (all drivers at once)
+    return frame[DRIVERS].rolling(WINDOW, min_periods=MIN_PAIRS).corr(frame['GHPI_YoY'])
+
+
+class Analytics:
+    def __init__(self, frame, sums, rolling):
+        self.frame = frame
+        self.sums = sums
+        self.rolling = rolling.round(3)
+        lags = np.arange(-MAX_LAG, MAX_LAG + 1)
+        # driver x lag matrix
+        self.lag_matrix = pd.DataFrame(_corr_from_sums(sums).T, index=DRIVERS, columns=lags).round(3)
+
+
+def _full(frame):
+    lags, y, xs, newest = _lag_pairs(frame)
+    return Analytics(frame, _pair_sums(y, xs, np.ones(newest.shape, dtype=bool)), _rolling(frame))
+
+
+def _extend(previous, frame):
+    # Years appended after previous.frame (history unchanged): add only the new pairs and
+    # compute only the rolling windows that end in a new year.
+    n_old = len(previous.frame)
+    lags, y, xs, newest = _lag_pairs(frame)
+    sums = previous.sums + _pair_sums(y, xs, newest >= n_old)
+    tail = _rolling(frame.iloc[max(n_old - WINDOW + 1, 0):]).iloc[-(len(frame) - n_old):]
+    return Analytics(frame, sums, pd.concat([previous.rolling, tail]))
+
+
+def _appends_to(previous, frame):
+    old = previous.frame
+    return (len(frame) > len(old) and list(frame.columns) == list(old.columns)
+            and frame.index[:len(old)].equals(old.index)
+            and np.array_equal(frame.iloc[:len(old)].to_numpy(), old.to_numpy(), equal_nan=True))
+
+
+_last = None  # Analytics of the newest generation built so far
+_lock = threading.Lock()
+
+
+def _build(ds):
+    global _last
+    frame = _frame(ds)
+    with _lock:
+        previous = _last
+        if previous is not None and _appends_to(previous, frame):
+            result = _extend(previous, frame)
+        elif previous is not None and frame.equals(previous.frame):
+            result = previous
+        else:
+            result = _full(frame)
+        _last = result
+    return result
+
+
+def get_analytics(ds=None):
+    ds = ds or ghpi_data.current()
+    return ds.derived(('analytics', WINDOW, MAX_LAG), _build)
+
+
+# Precompute as soon as a new generation is published, from the previous one when possible
+ghpi_data.on_refresh(get_analytics)
@@ -0,0 +1,125 @@
+import gzip
+import hashlib
+import json
+from email.utils import formatdate, parsedate_to_datetime
+
+from starlette.responses import Response
+from starlette.routing import Route
+
+import ghpi_analytics
+import ghpi_data
+import ghpi_forecast
+
+# --- HEADLESS DATA API ---
+# /api/ghpi, /api/macro, /api/kpi, /api/regional, /api/forecast, /api/correlation and
+# /api/rolling_correlation served straight from the ghpi_data cache: no Streamlit session or script run. Bodies (plain and gzipped) are
+# serialized once per dataset generation; conditional requests get a 304 from the ETag /
+# Last-Modified validators.
+FORMATS = {'json': 'application/json', 'csv': 'text/csv; charset=utf-8'}
+CACHE_CONTROL = 'public, max-age=300'
+
+
+def _table(name, ds, params):
+    if name == 'ghpi':
+        return ghpi_data.get_ghpi(ds=ds).drop(columns=['Date'])
+    if name == 'macro':
+        return ghpi_data.get_macro(ds=ds).drop(columns=['Date'])
+    if name == 'kpi':
+        table = ghpi_data.get_kpi_table(ds=ds).reset_index()
+        if params.get('series'):
+            table = table[table['Series'] == params['series']]
+        if params.get('year'):
+            table = table[table['Year'] == int(params['year'])]
+        return table
+    if name == 'regional':
+        regional = ghpi_data.get_regional(ds=ds)
+        if regional is None:
+            return None
+        return regional.drop(columns=['Date'])
+    if name == 'forecast':
+        return ghpi_forecast.get_forecast(ds)  # None (404) until the background fit is done
+    if name == 'correlation':
+        lag = ghpi_analytics.get_analytics(ds).lag_matrix
+        return lag.rename_axis(index='Driver', columns='Lag').stack(future_stack=True).rename('Correlation').reset_index()
+    if name == 'rolling_correlation':
+        return ghpi_analytics.get_analytics(ds).rolling.dropna(how='all').reset_index()
+    return None
+
+
+def _serialize(df, fmt, version):
+    df = ghpi_data.plain_floats(df)
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    return json.dumps({
+        'version': version,
+        'columns': list(df.columns),
+        'data': json.loads(df.to_json(orient='values')),
+    }, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def _payload(name, fmt, params, ds):
+    # Full tables are cached per dataset generation; filtered KPI queries are small
+    # lookups and are not cached (so arbitrary query strings cannot grow the cache).
+    def build(d):
+        df = _table(name, d, params)
+        if df is None or df.empty:
+            return None
+        body = _serialize(df, fmt, d.version)
+        return body, gzip.compress(body, 6)
+    if params:
+        return build(ds)
+    return ds.derived(('api', name, fmt), build)
+
+
+def not_modified(request, etag, last_modified):
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag in [t.strip() for t in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since:
+        try:
+            return int(last_modified) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _endpoint(name):
+    # Plain (sync) endpoint: Starlette runs it in its threadpool, so loading a generation,
+    # serializing and gzipping never block the event loop the Streamlit websockets use.
+    def endpoint(request):
+        fmt = request.query_params.get('format', 'json')
+        if fmt not in FORMATS:
+            return Response(f"Unsupported format '{fmt}' (json, csv)", status_code=400)
+        params = {k: request.query_params[k] for k in ('series', 'year') if name == 'kpi' and k in request.query_params}
+        if 'year' in params and not params['year'].isdigit():
+            return Response("'year' must be an integer", status_code=400)
+
+        ds = ghpi_data.current()
+        payload = _payload(name, fmt, params, ds)
+        if payload is None:
+            return Response('Not found', status_code=404)
+
+        # Each content-coding is its own representation, with its own strong validator
+        gzipped = 'gzip' in request.headers.get('accept-encoding', '')
+        query = hashlib.sha1(repr(sorted(params.items())).encode()).hexdigest()[:8]
+        etag = f'"{ds.version}-{name}-{fmt}-{query}{"-gz" if gzipped else ""}"'
+        headers = {
+            'ETag': etag,
+            'Last-Modified': formatdate(ds.last_modified, usegmt=True),
+            'Cache-Control': CACHE_CONTROL,
+            'Vary': 'Accept-Encoding',
+            'Access-Control-Allow-Origin': '*',
+        }
+        if not_modified(request, etag, ds.last_modified):
+            return Response(status_code=304, headers=headers)
+
+        body, body_gz = payload
+        if gzipped:
+            body = body_gz
+            headers['Content-Encoding'] = 'gzip'
+        return Response(body, media_type=FORMATS[fmt], headers=headers)
+    return endpoint
+
+
+routes = [Route(f'/api/{name}', _endpoint(name), methods=['GET']) for name in ('ghpi', 'macro', 'kpi', 'regional', 'forecast', 'correlation', 'rolling_correlation')]
@@ -1,11 +1,23 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
 import base64
-import requests
+import hashlib
+import os
 from datetime import timedelta
 
+import ghpi_analytics
+import ghpi_content
+import ghpi_data
+import ghpi_exports
+import ghpi_figures
+import ghpi_forecast
+import ghpi_lang
+import ghpi_metrics
+from ghpi_metrics import section
+
+# Section timers (no-ops unless GHPI_METRICS=1), exported on /metrics
+ghpi_metrics.start_run()
+
 # --- ΡΥΘΜΙΣΕΙΣ ΣΕΛΙΔΑΣ ---
 st.set_page_config(
     page_title="Δείκτης Τιμών Ακινήτων Ελλάδας (GHPI)",
@@ -61,17 +73,13 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # --- LANGUAGE LOGIC ---
-if 'lang_initialized' not in st.session_state:
-    detected_index = 1 
-    try:
-        response = requests.get('http://ip-api.com/json/', timeout=2)
-        if response.status_code == 200:
-            data = response.json()
-            if data.get('countryCode') == 'GR': detected_index = 0
-            else: detected_index = 1
-    except: pass
-    st.session_state['lang_index'] = detected_index
-    st.session_state['lang_initialized'] = True
+# Session state only holds small scalars (language, tab, widget values); every frame and
+# figure is a shared process-wide object from ghpi_data / ghpi_figures.
+if 'lang_index' not in st.session_state:
+    # Accept-Language first, then the process-wide geo-IP cache; never waits on the network.
+    with section('lang'):
+        detected_lang = ghpi_lang.detect_lang(st.context.headers, st.context.ip_address)
+    st.session_state['lang_index'] = 0 if detected_lang == 'el' else 1
 
 top_col1, top_col2 = st.columns([4, 1])
 with top_col2:
@@ -85,446 +93,283 @@ else:
     st.session_state['lang_index'] = 1
 
 # --- CONTENTS (ENHANCED SEO & METHODOLOGY) ---
-content = {
-    'el': {
-        'title': 'Δείκτης Τιμών Ακινήτων Ελλάδας (GHPI)',
-        'subtitle': 'από Γιακουμάκης Ακίνητα',
-        'intro_text': 'Ο επίσημος σύνθετος δείκτης για την πορεία της Ελληνικής Κτηματαγοράς.',
-        'tab_data': '📊 GHPI & Στατιστικά',
-        'tab_methodology': '📘 Μεθοδολογία & Ανάλυση',
-        'tab_macro': '📈 Μακροοικονομικά',
-        'tab_about': '🏢 Η Εταιρεία',
-        
-        # Stats & Charts
-        'stat_current': 'Τρέχουσα Τιμή (2025)', 'stat_yoy': 'Ετήσια Μεταβολή (1Y)', 'stat_5y': 'Μεταβολή 5ετίας (5Y)', 'stat_ath': 'Ιστορικό Υψηλό (ATH)', 'ath_desc': 'από το peak του 2008',
-        'chart_compare_title': 'Σύγκριση Πηγών: GHPI vs Επιμέρους Δείκτες', 'chart_yoy_title': 'Ετήσια Ποσοστιαία Μεταβολή (%)',
-        'table_title': 'Συνοπτικός Πίνακας', 'col_year': 'Έτος', 'col_ghpi': 'Δείκτης GHPI', 'col_yoy': 'Ετήσια Μεταβολή',
-        'full_table_title': 'Προβολή Πλήρων Δεδομένων (Όλοι οι Δείκτες)',
-        
-        # Macro Tab
-        'macro_intro': 'Συγκριτική ανάλυση βασικών δεικτών της Ελληνικής Οικονομίας σε σχέση με την Κτηματαγορά.',
-        'macro_c1_title': '1. Γενική Οικονομία: ΑΕΠ vs Χρηματιστήριο',
-        'macro_c2_title': '2. Προσφορά & Ζήτηση: Άδειες vs Συναλλαγές',
-        'macro_c3_title': '3. Ρευστότητα: Ξένες Επενδύσεις vs Στεγαστικά Δάνεια',
-        'macro_c4_title': '4. Πληθωρισμός vs Ακίνητα (Real Returns)',
-        'lbl_gdp': 'ΑΕΠ (Δις €)', 'lbl_inf': 'Πληθωρισμός (%)', 'lbl_ase': 'Γεν. Δείκτης ΧΑΑ', 'lbl_ghpi_yoy': 'Μεταβολή GHPI (%)',
-        'lbl_permits': 'Οικοδ. Άδειες (χιλ.)', 'lbl_fdi': 'Ξένες Επενδύσεις (FDI - εκ. €)', 'lbl_mort': 'Νέα Στεγαστικά (εκ. €)', 'lbl_trans': 'Συναλλαγές (χιλ.)',
-        'macro_table_title': 'Συγκεντρωτικός Πίνακας Μακροοικονομικών Δεικτών',
-
-        # --- UPDATED METHODOLOGY TEXTS ---
-        'method_title': 'Αναλυτική Μεθοδολογία & Σκεπτικό του Δείκτη GHPI',
-        
-        'meth_sec1_title': 'Γιατί είναι απαραίτητος ένας Σύνθετος Δείκτης;',
-        'meth_sec1_body': """
-        Οι δείκτες τιμών ακινήτων (House Price Indices - HPIs) αποτελούν θεμελιώδη εργαλεία για την κατανόηση της οικονομικής υγείας μιας χώρας. 
-        Επηρεάζουν τις αποφάσεις των επενδυτών, την πολιτική των τραπεζών και τον προγραμματισμό των κατασκευαστικών εταιρειών. 
-        Στην Ελλάδα, ωστόσο, η έλλειψη ενός κεντρικού, πλήρως διαφανούς μητρώου πραγματικών τιμών πώλησης δημιουργεί "θόρυβο" στην πληροφόρηση.
-        
-        Ο **GHPI (Giakoumakis House Price Index)** δημιουργήθηκε για να καλύψει αυτό το κενό. Αντί να βασίζεται σε μία μόνο πηγή, 
-        συνθέτει δεδομένα από τρεις διαφορετικές οπτικές γωνίες της αγοράς, προσφέροντας μια ολιστική και πιο αξιόπιστη εικόνα.
-        """,
-
-        'meth_sec2_title': 'Ανάλυση των Πηγών Δεδομένων (Sub-Indices)',
-        'meth_src1_t': '1. Τραπεζικές Εκτιμήσεις (Bank of Greece)',
-        'meth_src1_d': """
-        **Τι είναι:** Ο επίσημος δείκτης που βασίζεται στις εκτιμήσεις ακινήτων που πραγματοποιούν οι τράπεζες για την έκδοση δανείων.
-        \n**👍 Πλεονεκτήματα:** Υψηλή αξιοπιστία, πραγματοποιούνται από πιστοποιημένους εκτιμητές, μεγάλο δείγμα δεδομένων.
-        \n**👎 Μειονεκτήματα:** Οι εκτιμήσεις είναι συχνά συντηρητικές (χαμηλότερες της εμπορικής αξίας) και παρουσιάζουν χρονική υστέρηση (time lag) σε σχέση με την αγορά.
-        """,
-        
-        'meth_src2_t': '2. Ζητούμενες Τιμές (Market Asking Prices)',
-        'meth_src2_d': """
-        **Τι είναι:** Δεδομένα από μεγάλες πύλες αγγελιών (όπως το Spitogatos Network) που καταγράφουν τι ζητούν οι ιδιοκτήτες.
-        \n**👍 Πλεονεκτήματα:** Άμεση αποτύπωση του "κλίματος" και των προσδοκιών της αγοράς (Sentiment). Αντιδρά γρήγορα στις αλλαγές.
-        \n**👎 Μειονεκτήματα:** Η ζητούμενη τιμή σπάνια είναι η τιμή κλεισίματος (Closing Price). Συχνά περιέχει "καπέλο" διαπραγμάτευσης.
-        """,
-        
-        'meth_src3_t': '3. Κόστος Κατασκευής (Construction Cost - ELSTAT)',
-        'meth_src3_d': """
-        **Τι είναι:** Ο δείκτης κόστους υλικών και εργατικών για νέες κατοικίες από την ΕΛΣΤΑΤ.
-        \n**👍 Πλεονεκτήματα:** Αντικειμενικό, σκληρό δεδομένο. Δείχνει την "αξία αντικατάστασης" ενός ακινήτου.
-        \n**👎 Μειονεκτήματα:** Δεν λαμβάνει υπόψη την αξία της γης (οικόπεδο) ή την προσφορά και ζήτηση.
-        """,
-
-        'meth_sec3_title': 'Η Φόρμουλα του GHPI & Η Στάθμιση',
-        'meth_sec3_body': """
-        Επιλέξαμε μια σταθμισμένη προσέγγιση για να εξισορροπήσουμε τις αδυναμίες κάθε πηγής:
-        * **50% Τράπεζες:** Η μεγαλύτερη βαρύτητα δίνεται εδώ ως η πιο σταθερή και θεσμική βάση.
-        * **30% Αγορά (Αγγελίες):** Αρκετή βαρύτητα για να πιάσουμε την τάση, αλλά όχι κυρίαρχη για να αποφύγουμε τις "φούσκες" των ζητούμενων τιμών.
-        * **20% Κόστος:** Λειτουργεί ως άγκυρα λογικής. Οι τιμές δεν μπορούν μακροπρόθεσμα να πέσουν κάτω από το κόστος κατασκευής.
-        
-        **Γιατί Ετήσιος Δείκτης;**
-        Η αγορά ακινήτων είναι "αργή" (illiquid asset). Οι μηνιαίες διακυμάνσεις συχνά οφείλονται σε τυχαία γεγονότα ή εποχικότητα. 
-        Η ετήσια προσέγγιση φιλτράρει αυτόν τον θόρυβο και αναδεικνύει την πραγματική, μακροχρόνια τάση (Trend).
-        """,
-        
-        # ORIGINAL SOURCES
-        'sources_title': '📚 Πηγές Δεδομένων (Links)',
-        'source_1': '🏦 **Τράπεζα της Ελλάδος (Bank of Greece):** Δείκτες Τιμών Οικιστικών Ακινήτων (Πίνακας ΙΙ.1 - Στοιχεία από εκτιμήσεις τραπεζών).',
-        'source_2': '📈 **Spitogatos Network (SPI):** Spitogatos Property Index. Βάση δεδομένων ζητούμενων τιμών από αγγελίες ακινήτων.',
-        'source_3': '🏗️ **ΕΛΣΤΑΤ (Hellenic Statistical Authority):** Δείκτης Κόστους Υλικών Νέων Κτιρίων Κατοικιών.',
-
-        'hero_title': 'GIAKOUMAKIS REAL ESTATE', 'hero_subtitle': '50+ Χρόνια Εμπειρίας', 'hero_desc': 'Ολοκληρωμένες λύσεις ακινήτων από το 1970.',
-        'services_main_title': 'Οι Υπηρεσίες μας', 's1_t': 'Real Estate', 's1_d': 'Πωλήσεις & Ενοικιάσεις.', 's2_t': 'Μελέτες', 's2_d': 'Τοπογραφικά & Αρχιτεκτονικά.', 's3_t': 'Κατασκευές', 's3_d': 'Πολυτελείς κατοικίες.', 's4_t': 'Management', 's4_d': 'Διοίκηση έργων.', 's5_t': 'Ενέργεια', 's5_d': 'Αναβαθμίσεις.', 's6_t': 'Business', 's6_d': 'Τουριστική εκμετάλλευση.', 'visit_button': 'Επισκεφθείτε το giakoumakis.gr', 'footer': '© 2025 Giakoumakis Real Estate.'
-    },
-    'en': {
-        'title': 'Greece House Price Index (GHPI)',
-        'subtitle': 'by Giakoumakis Real Estate',
-        'intro_text': 'The official composite index tracking the Greek Real Estate Market.',
-        'tab_data': '📊 GHPI & Stats',
-        'tab_methodology': '📘 Methodology & Analysis',
-        'tab_macro': '📈 Macro Analysis',
-        'tab_about': '🏢 About Us',
-        
-        'stat_current': 'Current Value (2025)', 'stat_yoy': '1-Year Change (YoY)', 'stat_5y': '5-Year Change', 'stat_ath': 'All-Time High (ATH)', 'ath_desc': 'from 2008 peak',
-        'chart_compare_title': 'Source Comparison: GHPI vs Sub-Indices', 'chart_yoy_title': 'Annual Percentage Change (%)',
-        'table_title': 'Summary Table', 'col_year': 'Year', 'col_ghpi': 'GHPI Value', 'col_yoy': 'YoY Change',
-        'full_table_title': 'View Full Source Data (All Indices)',
-        
-        'macro_intro': 'Comparative analysis of key Greek Economic indicators vs Real Estate market.',
-        'macro_c1_title': '1. General Economy: GDP vs Stock Market',
-        'macro_c2_title': '2. Supply & Demand: Permits vs Transactions',
-        'macro_c3_title': '3. Liquidity: Foreign Investment (FDI) vs Mortgages',
-        'macro_c4_title': '4. Inflation vs Real Estate (Real Returns)',
-        'lbl_gdp': 'GDP (Billion €)', 'lbl_inf': 'Inflation (%)', 'lbl_ase': 'ASE Index', 'lbl_ghpi_yoy': 'GHPI Change (%)',
-        'lbl_permits': 'Build. Permits (thous.)', 'lbl_fdi': 'FDI (Real Estate - M€)', 'lbl_mort': 'New Mortgages (M€)', 'lbl_trans': 'Transactions (thous.)',
-        'macro_table_title': 'Consolidated Macroeconomic Data Table',
-
-        # --- UPDATED METHODOLOGY TEXTS ---
-        'method_title': 'Detailed Methodology & GHPI Framework',
-        
-        'meth_sec1_title': 'Why a Composite Index is Necessary?',
-        'meth_sec1_body': """
-        House Price Indices (HPIs) are fundamental tools for understanding a country's economic health. 
-        They influence investor decisions, banking policies, and developer planning. 
-        However, in Greece, the lack of a centralized, fully transparent registry of actual transaction prices creates "noise" in the data.
-        
-        The **GHPI (Giakoumakis House Price Index)** was created to bridge this gap. Instead of relying on a single source, 
-        it synthesizes data from three different market perspectives, offering a holistic and more reliable view.
-        """,
-
-        'meth_sec2_title': 'Analysis of Data Sources (Sub-Indices)',
-        'meth_src1_t': '1. Bank Valuations (Bank of Greece)',
-        'meth_src1_d': """
-        **What it is:** The official index based on property appraisals conducted by banks for mortgage purposes.
-        \n**👍 Pros:** High reliability, conducted by certified valuers, large dataset.
-        \n**👎 Cons:** Valuations are often conservative (below market value) and suffer from a time lag compared to the market.
-        """,
-        
-        'meth_src2_t': '2. Asking Prices (Market Sentiment)',
-        'meth_src2_d': """
-        **What it is:** Data from major listing portals (e.g., Spitogatos) recording what owners are asking for.
-        \n**👍 Pros:** Immediate reflection of market "sentiment" and expectations. Reacts quickly to changes.
-        \n**👎 Cons:** Asking price is rarely the Closing Price. It often contains a negotiation "premium" or bubble tendencies.
-        """,
-        
-        'meth_src3_t': '3. Construction Cost (ELSTAT)',
-        'meth_src3_d': """
-        **What it is:** The index of material and labor costs for new dwellings provided by the Statistical Authority.
-        \n**👍 Pros:** Objective, hard data. Shows the "replacement cost" of a property.
-        \n**👎 Cons:** Does not account for land value or supply/demand dynamics.
-        """,
-
-        'meth_sec3_title': 'The GHPI Formula & Weighting Strategy',
-        'meth_sec3_body': """
-        We chose a weighted approach to balance the weaknesses of each source:
-        * **50% Banks:** Given the highest weight as the most stable, institutional baseline.
-        * **30% Market (Listings):** Significant enough to capture trends, but not dominant to avoid asking-price volatility.
-        * **20% Cost:** Acts as a logic anchor. Prices cannot stay below construction costs in the long run.
-        
-        **Why an Annual Index?**
-        Real estate is an illiquid asset. Monthly fluctuations are often due to random events or seasonality. 
-        An annual approach filters out this noise and highlights the true, long-term Trend.
-        """,
-        
-        # ORIGINAL SOURCES
-        'sources_title': '📚 Data Sources (Links)',
-        'source_1': '🏦 **Bank of Greece:** Index of Apartment Prices.',
-        'source_2': '📈 **Spitogatos Network:** Asking prices database.',
-        'source_3': '🏗️ **ELSTAT:** Material Costs Index.',
-
-        'hero_title': 'GIAKOUMAKIS REAL ESTATE', 'hero_subtitle': '50+ Years of Experience', 'hero_desc': 'Integrated real estate solutions since 1970.',
-        'services_main_title': 'Our Services', 's1_t': 'Real Estate', 's1_d': 'Sales & Rentals.', 's2_t': 'Engineering', 's2_d': 'Topographical & Structural.', 's3_t': 'Construction', 's3_d': 'Luxury development.', 's4_t': 'Management', 's4_d': 'Project administration.', 's5_t': 'Energy', 's5_d': 'Efficiency solutions.', 's6_t': 'Business', 's6_d': 'Hospitality operations.', 'visit_button': 'Visit giakoumakis.gr', 'footer': '© 2025 Giakoumakis Real Estate.'
-    }
-}
-text = content[lang]
+# Locale catalog and prebuilt HTML blocks, loaded once per process in ghpi_content
+with section('content'):
+    text = ghpi_content.CONTENT[lang]
+    fragments = ghpi_content.FRAGMENTS[lang]
 
 # --- HEADER ---
-with top_col1:
-    logo_html = ""
+# The logo is served from ./static so each browser fetches it once; the version query changes
+# with the file. Without static serving, fall back to a data URI encoded once per process.
+@st.cache_resource(show_spinner=False)
+def logo_src(static_serving):
     try:
-        with open("logo.png", "rb") as f:
-            encoded_img = base64.b64encode(f.read()).decode()
-        logo_html = f'<img src="data:image/png;base64,{encoded_img}" class="logo-img">'
-    except: pass
+        with open(os.path.join(os.path.dirname(__file__), "static", "logo.png"), "rb") as f:
+            raw = f.read()
+    except OSError:
+        return None
+    if static_serving:
+        return f"app/static/logo.png?v={hashlib.sha1(raw).hexdigest()[:8]}"
+    return f"data:image/png;base64,{base64.b64encode(raw).decode()}"
+
+with top_col1, section('header'):
+    logo_html = ""
+    logo_url = logo_src(st.get_option("server.enableStaticServing"))
+    if logo_url: logo_html = f'<img src="{logo_url}" class="logo-img">'
     st.markdown(f"""<div class="header-container">{logo_html}<div class="title-container"><div class="main-title">{text["title"]}</div><div class="subtitle">{text["subtitle"]}</div></div></div>""", unsafe_allow_html=True)
 
 st.markdown(f'<div class="intro">{text["intro_text"]}</div>', unsafe_allow_html=True)
 
-# --- DATA ENGINE (GHPI) ---
-data = {
-    'Year': list(range(2000, 2026)),
-    'BoG_Index': [58, 66, 75, 80, 85, 92, 98, 102, 101, 97, 92, 87, 76, 68, 63, 60, 59.5, 59, 60, 64.5, 67, 72, 80, 91, 99.5, 105],
-    'SPI_Index': [60, 68, 78, 85, 90, 96, 100, 105, 104, 100, 95, 90, 82, 75, 70, 68, 67, 66, 69, 75, 79, 85, 95, 109, 122, 134],
-    'ELSTAT_Cost': [70, 72, 75, 78, 82, 86, 90, 93, 96, 98, 100, 101, 100, 98, 96, 95, 94, 95, 96, 97, 96.5, 100, 110, 118, 125, 129]
-}
-df = pd.DataFrame(data)
-df['Date'] = pd.to_datetime(df['Year'], format='%Y')
-
-df['GHPI'] = (df['BoG_Index'] * 0.50) + (df['SPI_Index'] * 0.30) + (df['ELSTAT_Cost'] * 0.20)
-df['GHPI'] = df['GHPI'].round(1)
-df['YoY_Change'] = df['GHPI'].pct_change() * 100
-
-# --- DATA ENGINE (MACROECONOMIC) ---
-macro_data = {
-    'Year': list(range(2000, 2026)),
-    'GDP_Billion': [141, 152, 163, 178, 193, 199, 217, 232, 242, 237, 226, 207, 191, 180, 178, 176, 174, 177, 180, 183, 165, 181, 206, 220, 235, 245],
-    'Inflation': [3.2, 3.4, 3.6, 3.5, 2.9, 3.5, 3.2, 2.9, 4.2, 1.2, 4.7, 3.3, 1.5, -0.9, -1.3, -1.7, -0.8, 1.1, 0.6, 0.3, -1.2, 1.2, 9.6, 3.5, 2.9, 2.5],
-    'ASE_Index': [3400, 2600, 1750, 2260, 2790, 3540, 4400, 5178, 1786, 2196, 1413, 680, 907, 1162, 826, 631, 643, 802, 613, 916, 809, 893, 929, 1293, 1420, 1510],
-    'Permits_Thous': [75, 82, 85, 89, 82, 96, 88, 79, 65, 56, 48, 32, 25, 16, 13, 12, 12.5, 13, 15, 17, 19, 23, 25, 27, 29, 31],
-    'FDI_RealEstate_M': [100, 150, 180, 250, 300, 450, 900, 1100, 950, 700, 300, 150, 100, 250, 400, 600, 800, 1100, 1300, 1450, 900, 1100, 1975, 2100, 2300, 2500],
-    'Mortgages_New_M': [4500, 6000, 8500, 11000, 13500, 15000, 16000, 15500, 11000, 6000, 3500, 1500, 800, 500, 450, 400, 450, 500, 600, 750, 800, 1000, 1200, 1300, 1500, 1700],
-    'Transactions_Thous': [150, 165, 170, 160, 155, 175, 160, 145, 110, 85, 70, 50, 40, 35, 30, 38, 45, 55, 65, 75, 60, 75, 85, 95, 100, 105]
-}
-df_macro = pd.DataFrame(macro_data)
-df_macro['Date'] = pd.to_datetime(df_macro['Year'], format='%Y')
-df_macro['GHPI_YoY'] = df['YoY_Change']
-
-min_date = df['Date'].min()
-max_date = df['Date'].max()
-
-# KPI Calcs
-latest_val, prev_year_val = df['GHPI'].iloc[-1], df['GHPI'].iloc[-2]
-yoy_pct, yoy_diff = df['YoY_Change'].iloc[-1], latest_val - prev_year_val
-five_years_ago_val = df['GHPI'].iloc[-6]
-five_y_pct, five_y_diff = ((latest_val - five_years_ago_val) / five_years_ago_val) * 100, latest_val - five_years_ago_val
-ath_val = df['GHPI'].max()
-diff_from_ath = latest_val - ath_val 
-
-# --- COMMON CHART SETTINGS ---
-common_xaxis = dict(
-    type="date",
-    range=[min_date, max_date], 
-    fixedrange=True, # Lock Zoom
-    rangeselector=dict(
-        buttons=list([
-            dict(count=5, label="5Y", step="year", stepmode="backward"),
-            dict(count=10, label="10Y", step="year", stepmode="backward"),
-            dict(step="all", label="MAX")
-        ]),
-        bgcolor='#f0f2f6',
-        activecolor='#d1d5db', # Light Grey active color
-        font=dict(color='black'), # Force black text
-        x=1, 
-        y=1.2,
-        xanchor='right'
-    )
-)
-
-no_zoom_config = {
-    'displayModeBar': False, 
-    'scrollZoom': False,  
-    'doubleClick': False, 
-    'showTips': False
-}
+# --- DATA ENGINE ---
+# Built once per process and data version in ghpi_data; reruns only do a cache lookup.
+# One Dataset generation per rerun, so a data refresh never mixes old and new frames.
+with section('data'):
+    ds = ghpi_data.current()
+    df = ghpi_data.get_ghpi(ds=ds)
+    df_macro = ghpi_data.get_macro(ds=ds)
+    kpi_table = ghpi_data.get_kpi_table(ds=ds)
+    kpi_years = kpi_table.loc['GHPI'].index[::-1].tolist()
+
+# --- FIGURES ---
+# Built once per (data version, language) in ghpi_figures and reused by every session.
+with section('figures'):
+    figs = ghpi_figures.get_figures(lang, text, ds)
+no_zoom_config = ghpi_figures.no_zoom_config
 
 # --- TABS ---
-tab1, tab2, tab3, tab4 = st.tabs([f"{text['tab_data']}", f"{text['tab_methodology']}", f"{text['tab_macro']}", f"{text['tab_about']}"])
+# Lazy tabs: only the selected tab's body runs and is sent to the browser; switching
+# tabs reruns the script. The tab index survives a language switch (labels change).
+tab_labels = [f"{text['tab_data']}", f"{text['tab_methodology']}", f"{text['tab_macro']}", f"{text['tab_about']}"]
+tabs = st.tabs(tab_labels, default=tab_labels[st.session_state.get('tab_index', 0)], key=f"main_tabs_{lang}", on_change="rerun")
+tab1, tab2, tab3, tab4 = tabs
+st.session_state['tab_index'] = next((i for i, tab in enumerate(tabs) if tab.open), 0)
+
+# --- WEIGHTS SANDBOX ---
+# A fragment: moving a slider reruns only this block, and the GHPI for the chosen
+# weights is one NumPy matrix product in ghpi_data (no DataFrame rebuild).
+@st.fragment
+def weights_sandbox():
+    st.markdown(f"##### {text['weights_title']}")
+    st.caption(text['weights_intro'])
+    w1, w2, w3 = st.columns(3)
+    with w1: w_bog = st.slider(text['w_bog'], 0, 100, 50, 5, key="w_bog")
+    with w2: w_spi = st.slider(text['w_spi'], 0, 100, 30, 5, key="w_spi")
+    with w3: w_cost = st.slider(text['w_cost'], 0, 100, 20, 5, key="w_cost")
+    total = w_bog + w_spi + w_cost
+    if total == 0:
+        st.warning(text['weights_zero'])
+        return
+    weights = (w_bog / total, w_spi / total, w_cost / total)
+    st.caption(f"{text['weights_normalized']}: {weights[0]:.0%} / {weights[1]:.0%} / {weights[2]:.0%}")
+    with section('weights'):
+        custom = ghpi_data.ghpi_matrix(weights, ds)
+        custom_yoy = ghpi_data.yoy_matrix(custom)
+        band_lo, band_hi = ghpi_data.sensitivity_band(ds=ds)
+        fig_weights = ghpi_figures.weights_figure(df['Date'], df['GHPI'], custom, band_lo, band_hi, text)
+    year = int(df['Year'].iloc[-1])
+    m1, m2, _ = st.columns([1, 1, 2])
+    m1.metric(f"{text['lbl_custom']} ({year})", f"{custom[-1]:.1f}", f"{custom_yoy[-1]:+.1f}%")
+    m2.metric(f"GHPI ({year})", f"{df['GHPI'].iloc[-1]:.1f}", f"{df['YoY_Change'].iloc[-1]:+.1f}%")
+    with section('chart_weights'): st.plotly_chart(fig_weights, use_container_width=True, config=no_zoom_config)
+
+# --- EXPORTS ---
+# Bytes are built once per data version and language in ghpi_exports; the callable only
+# runs when a button is clicked, so reruns never touch the files.
+def export_buttons(table):
+    *cols, _ = st.columns([1] * len(ghpi_exports.FORMATS) + [8])
+    for col, fmt in zip(cols, ghpi_exports.FORMATS):
+        with col:
+            st.download_button(
+                f"⬇ {fmt.upper()}", data=lambda fmt=fmt: ghpi_exports.get_export(table, fmt, lang, ds),
+                file_name=ghpi_exports.file_name(table, fmt, lang), mime=ghpi_exports.FORMATS[fmt],
+                on_click="ignore", help=text['export_label'], key=f"export_{table}_{fmt}"
+            )
 
 # === TAB 1: DATA & CHARTS ===
-with tab1:
-    kpi1, kpi2, kpi3, kpi4 = st.columns(4)
-    with kpi1: st.metric(label=text['stat_current'], value=f"{latest_val}", delta=None)
-    with kpi2: st.metric(label=text['stat_yoy'], value=f"{yoy_pct:.1f}%", delta=f"{yoy_diff:.1f}")
-    with kpi3: st.metric(label=text['stat_5y'], value=f"{five_y_pct:.1f}%", delta=f"{five_y_diff:.1f}")
-    with kpi4: st.metric(label=text['stat_ath'], value=f"{ath_val}", delta=f"{diff_from_ath:.1f}", delta_color="normal")
-    st.caption(f"* {text['stat_ath']}: {text['ath_desc']}")
-    st.divider()
-
-    st.subheader(text['chart_compare_title'])
-    fig_comp = go.Figure()
-    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['BoG_Index'], name='Bank of Greece', line=dict(dash='dot', width=1.5, color='#0088C3'))) 
-    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['SPI_Index'], name='Market Prices', line=dict(dash='dot', width=1.5, color='#EF4444'))) 
-    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['ELSTAT_Cost'], name='Construction Cost', line=dict(dash='dot', width=1.5, color='#10B981'))) 
-    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['GHPI'], name='GHPI', line=dict(color='#003B71', width=4))) 
+if tab1.open:
+    with tab1:
+        # KPI cards: a lookup in the precomputed snapshot table for the chosen year
+        _, year_col = st.columns([4, 1])
+        with year_col: kpi_year = st.selectbox(text['kpi_year'], kpi_years, index=0, key="kpi_year")
+        with section('kpi'): k = ghpi_data.kpi('GHPI', kpi_year, ds=ds)
+        pct = lambda x: f"{x:.1f}%" if pd.notnull(x) else "–"
+        diff = lambda x: f"{x:.1f}" if pd.notnull(x) else None
+        kpi1, kpi2, kpi3, kpi4 = st.columns(4)
+        with kpi1: st.metric(label=text['stat_current'].format(year=kpi_year), value=f"{k['Value']}", delta=None)
+        with kpi2: st.metric(label=text['stat_yoy'], value=pct(k['YoY_Pct']), delta=diff(k['YoY_Diff']))
+        with kpi3: st.metric(label=text['stat_5y'], value=pct(k['5Y_Pct']), delta=diff(k['5Y_Diff']))
+        with kpi4: st.metric(label=text['stat_ath'], value=f"{k['ATH']}", delta=diff(k['Drawdown']), delta_color="normal")
+        st.caption(f"* {text['stat_ath']}: {text['ath_desc'].format(year=kpi_year, ath_year=k['ATH_Year'])}")
+        st.divider()
+
+        st.subheader(text['chart_compare_title'])
+        with section('chart_comp'): st.plotly_chart(figs['comp'], use_container_width=True, config=no_zoom_config)
+
+        # Regional breakdown (only when a data/regional.* drop exists)
+        if ghpi_data.has_regional(ds):
+            st.subheader(text['regional_title'])
+            with section('regional'): df_regional = ghpi_data.get_regional(ds=ds)
+            r1, r2 = st.columns([3, 1])
+            with r2: property_type = st.selectbox(text['regional_type'], list(df_regional['Property_Type'].cat.categories), key="regional_type")
+            with section('regional'): pivot = ghpi_data.regional_pivot(property_type, ds=ds)
+            with r1: regions = st.multiselect(text['regional_regions'], list(pivot.columns), default=list(pivot.columns[:3]), key="regional_regions")
+            if regions:
+                with section('chart_regional'): st.plotly_chart(ghpi_figures.regional_figure(pivot, regions, df.set_index('Date')['GHPI'], text), use_container_width=True, config=no_zoom_config)
+
+        st.subheader(text['chart_yoy_title'])
+        with section('chart_bar'): st.plotly_chart(figs['bar'], use_container_width=True, config=no_zoom_config)
+
+        # Projection: fitted in a background process per data version (ghpi_forecast); this
+        # only reads the cached forecast and draws it.
+        st.subheader(text['forecast_title'])
+        forecast = ghpi_forecast.get_result(ds)
+        if forecast is None:
+            st.caption(text['forecast_unavailable'] if ghpi_forecast.failed(ds) else text['forecast_pending'])
+        else:
+            models = [m for m in ghpi_forecast.MODELS if m in forecast['models']]
+            model = st.radio(text['forecast_model'], models, format_func=lambda m: text[f'model_{m}'], horizontal=True, key="forecast_model")
+            with section('chart_forecast'):
+                st.plotly_chart(ghpi_figures.forecast_figure(df.set_index('Date')['GHPI'], pd.DataFrame(forecast['models'][model]['forecast']), text), use_container_width=True, config=no_zoom_config)
+            st.caption(text['forecast_note'].format(rmse=forecast['models'][model]['rmse']))
     
-    fig_comp.update_layout(
-        hovermode="x unified", height=450, legend=dict(orientation="h", y=1.2), 
-        margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
-        dragmode=False, xaxis=common_xaxis, yaxis=dict(fixedrange=True) 
-    )
-    st.plotly_chart(fig_comp, use_container_width=True, config=no_zoom_config)
-
-    st.subheader(text['chart_yoy_title'])
-    colors = ['#EF4444' if x < 0 else '#10B981' for x in df['YoY_Change']]
-    fig_bar = go.Figure(go.Bar(x=df['Date'], y=df['YoY_Change'], marker_color=colors, text=df['YoY_Change'].apply(lambda x: f'{x:.1f}%' if pd.notnull(x) else ''), textposition='outside'))
-    fig_bar.update_layout(
-        height=350, showlegend=False, margin=dict(l=20, r=20, t=20, b=20), 
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
-        dragmode=False, xaxis=common_xaxis, yaxis=dict(fixedrange=True)
-    )
-    st.plotly_chart(fig_bar, use_container_width=True, config=no_zoom_config)
+        st.divider()
+        st.subheader(text['table_title'])
+        with section('dataframe_summary'):
+            table_df = df[['Year', 'GHPI', 'YoY_Change']].sort_values(by='Year', ascending=False)
+            st.dataframe(table_df, column_config={"Year": st.column_config.NumberColumn(text['col_year'], format="%d"), "GHPI": st.column_config.NumberColumn(text['col_ghpi'], format="%.1f"), "YoY_Change": st.column_config.NumberColumn(text['col_yoy'], format="%.1f%%")}, use_container_width=True, hide_index=True, height=400)
     
-    st.divider()
-    st.subheader(text['table_title'])
-    table_df = df[['Year', 'GHPI', 'YoY_Change']].sort_values(by='Year', ascending=False)
-    st.dataframe(table_df, column_config={"Year": st.column_config.NumberColumn(text['col_year'], format="%d"), "GHPI": st.column_config.NumberColumn(text['col_ghpi'], format="%.1f"), "YoY_Change": st.column_config.NumberColumn(text['col_yoy'], format="%.1f%%")}, use_container_width=True, hide_index=True, height=400)
-    
-    with st.expander(f"📂 {text['full_table_title']}"):
-        full_df_display = df.sort_values(by='Year', ascending=False)
-        st.dataframe(
-            full_df_display,
-            column_config={
-                "Year": st.column_config.NumberColumn("Year / Έτος", format="%d"),
-                "BoG_Index": st.column_config.NumberColumn("Bank of Greece", format="%.1f"),
-                "SPI_Index": st.column_config.NumberColumn("Market Prices", format="%.1f"),
-                "ELSTAT_Cost": st.column_config.NumberColumn("Constr. Cost", format="%.1f"),
-                "GHPI": st.column_config.NumberColumn("GHPI", format="%.1f"),
-                "YoY_Change": st.column_config.NumberColumn("YoY %", format="%.1f%%")
-            },
-            use_container_width=True,
-            hide_index=True
-        )
+        with st.expander(f"📂 {text['full_table_title']}"), section('dataframe_full'):
+            full_df_display = df.sort_values(by='Year', ascending=False)
+            st.dataframe(
+                full_df_display,
+                column_config={
+                    "Year": st.column_config.NumberColumn("Year / Έτος", format="%d"),
+                    "BoG_Index": st.column_config.NumberColumn("Bank of Greece", format="%.1f"),
+                    "SPI_Index": st.column_config.NumberColumn("Market Prices", format="%.1f"),
+                    "ELSTAT_Cost": st.column_config.NumberColumn("Constr. Cost", format="%.1f"),
+                    "GHPI": st.column_config.NumberColumn("GHPI", format="%.1f"),
+                    "YoY_Change": st.column_config.NumberColumn("YoY %", format="%.1f%%")
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            export_buttons('ghpi')
 
 # === TAB 2: METHODOLOGY (UPDATED LAYOUT) ===
-with tab2:
-    st.header(text['method_title'])
+if tab2.open:
+    with tab2:
+        st.header(text['method_title'])
     
-    # Section 1: Introduction
-    st.subheader(text['meth_sec1_title'])
-    st.markdown(text['meth_sec1_body'])
-    st.divider()
-
-    # Section 2: Formula & Visualization
-    st.subheader(text['meth_sec3_title'])
-    st.markdown(text['meth_sec3_body'])
-    st.info("The Formula / Ο Τύπος:")
-    st.latex(r'''GHPI_t = (0.5 \times I_{Bank}) + (0.3 \times I_{Market}) + (0.2 \times I_{Cost})''')
-    st.divider()
+        # Section 1: Introduction
+        st.subheader(text['meth_sec1_title'])
+        st.markdown(text['meth_sec1_body'])
+        st.divider()
+
+        # Section 2: Formula & Visualization
+        st.subheader(text['meth_sec3_title'])
+        st.markdown(text['meth_sec3_body'])
+        st.info("The Formula / Ο Τύπος:")
+        st.latex(r'''GHPI_t = (0.5 \times I_{Bank}) + (0.3 \times I_{Market}) + (0.2 \times I_{Cost})''')
+        weights_sandbox()
+        st.divider()
     
-    # Section 3: Deep Dive into Sources (Columns)
-    st.subheader(text['meth_sec2_title'])
-    c1, c2, c3 = st.columns(3)
+        # Section 3: Deep Dive into Sources (Columns)
+        st.subheader(text['meth_sec2_title'])
+        c1, c2, c3 = st.columns(3)
     
-    with c1:
-        st.markdown(f"#### {text['meth_src1_t']}")
-        st.info(text['meth_src1_d'])
+        with c1:
+            st.markdown(f"#### {text['meth_src1_t']}")
+            st.info(text['meth_src1_d'])
         
-    with c2:
-        st.markdown(f"#### {text['meth_src2_t']}")
-        st.warning(text['meth_src2_d'])
+        with c2:
+            st.markdown(f"#### {text['meth_src2_t']}")
+            st.warning(text['meth_src2_d'])
         
-    with c3:
-        st.markdown(f"#### {text['meth_src3_t']}")
-        st.success(text['meth_src3_d'])
+        with c3:
+            st.markdown(f"#### {text['meth_src3_t']}")
+            st.success(text['meth_src3_d'])
         
-    st.divider()
+        st.divider()
     
-    # ADDED BACK: SOURCES BOX
-    st.subheader(text['sources_title'])
-    st.markdown(f"""<div class="source-box">{text['source_1']}<br><br>{text['source_2']}<br><br>{text['source_3']}</div>""", unsafe_allow_html=True)
+        # ADDED BACK: SOURCES BOX
+        st.subheader(text['sources_title'])
+        st.markdown(fragments['source_box'], unsafe_allow_html=True)
     
-    st.caption("Data sources are updated annually to ensure consistency and eliminate seasonal noise.")
+        st.caption("Data sources are updated annually to ensure consistency and eliminate seasonal noise.")
 
 # === TAB 3: MACROECONOMIC ANALYSIS ===
-with tab3:
-    st.header(f"📊 {text['tab_macro']}")
-    st.markdown(f"*{text['macro_intro']}*")
+if tab3.open:
+    with tab3:
+        st.header(f"📊 {text['tab_macro']}")
+        st.markdown(f"*{text['macro_intro']}*")
     
-    # --- CHART 1 ---
-    st.subheader(text['macro_c1_title'])
-    fig_macro1 = make_subplots(specs=[[{"secondary_y": True}]])
-    fig_macro1.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['GDP_Billion'], name=text['lbl_gdp'], marker_color='#003B71', opacity=0.7), secondary_y=False)
-    fig_macro1.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['ASE_Index'], name=text['lbl_ase'], line=dict(color='#FFA500', width=3)), secondary_y=True)
-    fig_macro1.update_layout(
-        height=400, hovermode="x unified", legend=dict(orientation="h", y=1.2), 
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
-        dragmode=False, xaxis=common_xaxis, yaxis=dict(fixedrange=True), yaxis2=dict(fixedrange=True)
-    )
-    fig_macro1.update_yaxes(title_text="GDP (€ Bn)", secondary_y=False)
-    fig_macro1.update_yaxes(title_text="ASE Index Points", secondary_y=True)
-    st.plotly_chart(fig_macro1, use_container_width=True, config=no_zoom_config)
+        # --- CHART 1 ---
+        st.subheader(text['macro_c1_title'])
+        with section('chart_macro1'): st.plotly_chart(figs['macro1'], use_container_width=True, config=no_zoom_config)
     
-    st.divider()
-
-    # --- CHART 2 ---
-    st.subheader(text['macro_c2_title'])
-    fig_macro_act = go.Figure()
-    fig_macro_act.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['Transactions_Thous'], name=text['lbl_trans'], marker_color='#60A5FA', opacity=0.6))
-    fig_macro_act.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['Permits_Thous'], name=text['lbl_permits'], line=dict(color='#0088C3', width=3)))
-    fig_macro_act.update_layout(
-        height=400, hovermode="x unified", legend=dict(orientation="h", y=1.2), 
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None), 
-        yaxis_title="Units (Thousands)",
-        dragmode=False, xaxis=common_xaxis, yaxis=dict(fixedrange=True)
-    )
-    st.plotly_chart(fig_macro_act, use_container_width=True, config=no_zoom_config)
-
-    st.divider()
-
-    # --- CHART 3 ---
-    st.subheader(text['macro_c3_title'])
-    fig_macro_liq = go.Figure()
-    fig_macro_liq.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['FDI_RealEstate_M'], name=text['lbl_fdi'], marker_color='#059669', opacity=0.7))
-    fig_macro_liq.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['Mortgages_New_M'], name=text['lbl_mort'], line=dict(color='#F43F5E', width=3)))
-    fig_macro_liq.update_layout(
-        height=400, hovermode="x unified", legend=dict(orientation="h", y=1.2), 
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None), 
-        yaxis_title="Amount (Million €)",
-        dragmode=False, xaxis=common_xaxis, yaxis=dict(fixedrange=True)
-    )
-    st.plotly_chart(fig_macro_liq, use_container_width=True, config=no_zoom_config)
+        st.divider()
+
+        # --- CHART 2 ---
+        st.subheader(text['macro_c2_title'])
+        with section('chart_macro_act'): st.plotly_chart(figs['macro_act'], use_container_width=True, config=no_zoom_config)
+
+        st.divider()
+
+        # --- CHART 3 ---
+        st.subheader(text['macro_c3_title'])
+        with section('chart_macro_liq'): st.plotly_chart(figs['macro_liq'], use_container_width=True, config=no_zoom_config)
     
-    st.divider()
-
-    # --- CHART 4 ---
-    st.subheader(text['macro_c4_title'])
-    fig_macro2 = go.Figure()
-    fig_macro2.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['Inflation'], name=text['lbl_inf'], line=dict(color='#EF4444', width=2, dash='dot')))
-    fig_macro2.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['GHPI_YoY'], name=text['lbl_ghpi_yoy'], marker_color='#10B981', opacity=0.8))
-    fig_macro2.update_layout(
-        height=400, hovermode="x unified", legend=dict(orientation="h", y=1.2), 
-        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None), 
-        yaxis_title="Percentage (%)",
-        dragmode=False, xaxis=common_xaxis, yaxis=dict(fixedrange=True)
-    )
-    st.plotly_chart(fig_macro2, use_container_width=True, config=no_zoom_config)
-
-    # --- TABLE ---
-    with st.expander(f"📂 {text['macro_table_title']}", expanded=False):
-        macro_display = df_macro.drop(columns=['Date', 'GHPI_YoY']).sort_values(by='Year', ascending=False)
-        st.dataframe(
-            macro_display,
-            column_config={
-                "Year": st.column_config.NumberColumn(text['col_year'], format="%d"),
-                "GDP_Billion": st.column_config.NumberColumn("GDP (€Bn)", format="€ %.0f B"),
-                "Inflation": st.column_config.NumberColumn("Inflation", format="%.1f%%"),
-                "ASE_Index": st.column_config.NumberColumn("ASE", format="%d"),
-                "Transactions_Thous": st.column_config.NumberColumn("Trans.", format="%.0f k"),
-                "Permits_Thous": st.column_config.NumberColumn("Permits", format="%.1f k"),
-                "FDI_RealEstate_M": st.column_config.NumberColumn("FDI (RE)", format="€ %.0f M"),
-                "Mortgages_New_M": st.column_config.NumberColumn("Mortgages", format="€ %.0f M"),
-            },
-            use_container_width=True,
-            hide_index=True
-        )
+        st.divider()
+
+        # --- CHART 4 ---
+        st.subheader(text['macro_c4_title'])
+        with section('chart_macro2'): st.plotly_chart(figs['macro2'], use_container_width=True, config=no_zoom_config)
+
+        st.divider()
+
+        # --- CHART 5: CORRELATIONS (precomputed per data version, ghpi_analytics) ---
+        st.subheader(text['macro_c5_title'])
+        st.caption(text['corr_intro'])
+        with section('chart_corr'):
+            st.plotly_chart(figs['corr_lag'], use_container_width=True, config=no_zoom_config)
+            st.markdown(f"**{text['corr_rolling_title'].format(window=ghpi_analytics.WINDOW)}**")
+            st.plotly_chart(figs['corr_rolling'], use_container_width=True, config=no_zoom_config)
+
+        # --- TABLE ---
+        with st.expander(f"📂 {text['macro_table_title']}", expanded=False), section('dataframe_macro'):
+            macro_display = df_macro.drop(columns=['Date', 'GHPI_YoY']).sort_values(by='Year', ascending=False)
+            st.dataframe(
+                macro_display,
+                column_config={
+                    "Year": st.column_config.NumberColumn(text['col_year'], format="%d"),
+                    "GDP_Billion": st.column_config.NumberColumn("GDP (€Bn)", format="€ %.0f B"),
+                    "Inflation": st.column_config.NumberColumn("Inflation", format="%.1f%%"),
+                    "ASE_Index": st.column_config.NumberColumn("ASE", format="%d"),
+                    "Transactions_Thous": st.column_config.NumberColumn("Trans.", format="%.0f k"),
+                    "Permits_Thous": st.column_config.NumberColumn("Permits", format="%.1f k"),
+                    "FDI_RealEstate_M": st.column_config.NumberColumn("FDI (RE)", format="€ %.0f M"),
+                    "Mortgages_New_M": st.column_config.NumberColumn("Mortgages", format="€ %.0f M"),
+                },
+                use_container_width=True,
+                hide_index=True
+            )
+            export_buttons('macro')
 
 # === TAB 4: ABOUT US ===
-with tab4:
-    st.markdown(f"""<div class="hero-container"><div class="hero-title">{text['hero_title']}</div><div class="hero-subtitle">{text['hero_subtitle']}</div><div class="hero-text">{text['hero_desc']}</div></div>""", unsafe_allow_html=True)
-    st.subheader(text['services_main_title'])
-    col1, col2, col3 = st.columns(3)
-    with col1: st.markdown(f"""<div class="service-card"><div class="service-icon">🏡</div><div class="service-title">{text['s1_t']}</div><div class="service-desc">{text['s1_d']}</div></div>""", unsafe_allow_html=True)
-    with col2: st.markdown(f"""<div class="service-card"><div class="service-icon">📐</div><div class="service-title">{text['s2_t']}</div><div class="service-desc">{text['s2_d']}</div></div>""", unsafe_allow_html=True)
-    with col3: st.markdown(f"""<div class="service-card"><div class="service-icon">🏗️</div><div class="service-title">{text['s3_t']}</div><div class="service-desc">{text['s3_d']}</div></div>""", unsafe_allow_html=True)
-    st.write("") 
-    col4, col5, col6 = st.columns(3)
-    with col4: st.markdown(f"""<div class="service-card"><div class="service-icon">🤝</div><div class="service-title">{text['s4_t']}</div><div class="service-desc">{text['s4_d']}</div></div>""", unsafe_allow_html=True)
-    with col5: st.markdown(f"""<div class="service-card"><div class="service-icon">⚡</div><div class="service-title">{text['s5_t']}</div><div class="service-desc">{text['s5_d']}</div></div>""", unsafe_allow_html=True)
-    with col6: st.markdown(f"""<div class="service-card"><div class="service-icon">🏨</div><div class="service-title">{text['s6_t']}</div><div class="service-desc">{text['s6_d']}</div></div>""", unsafe_allow_html=True)
-    st.divider()
-    st.markdown(f"""<div style="text-align: center; margin-top: 30px;"><a href="https://www.giakoumakis.gr" target="_blank" style="background-color: #0088C3; color: white; padding: 16px 40px; text-align: center; text-decoration: none; display: inline-block; font-size: 18px; border-radius: 50px; font-weight: bold; box-shadow: 0 4px 15px rgba(0, 136, 195, 0.4); transition: all 0.3s ease;">{text['visit_button']} 🌐</a></div>""", unsafe_allow_html=True)
+if tab4.open:
+    with tab4:
+        st.markdown(fragments['hero'], unsafe_allow_html=True)
+        st.subheader(text['services_main_title'])
+        for col, card in zip(st.columns(3), fragments['services'][:3]):
+            with col: st.markdown(card, unsafe_allow_html=True)
+        st.write("") 
+        for col, card in zip(st.columns(3), fragments['services'][3:]):
+            with col: st.markdown(card, unsafe_allow_html=True)
+        st.divider()
+        st.markdown(fragments['visit_button'], unsafe_allow_html=True)
 
 # --- FOOTER ---
 st.markdown("---")
 st.markdown(f"<div style='text-align: center; color: grey; font-size: 0.8rem;'>{text['footer']}</div>", unsafe_allow_html=True)
+ghpi_metrics.end_run()
+
@@ -0,0 +1,231 @@
+"""Headless load / rerun benchmark for ghpi_app.py.
+
+Drives the page through Streamlit's AppTest the way a visitor does (initial load,
+language toggle, every tab) for many sessions and reports p50 / p99 rerun latency per
+step, time spent per stage (data engine, figure building, chart and dataframe
+serialization) and resident memory per live session. Geo-IP lookups go to a local
+ip-api.com stand-in, never to the network.
+
+AppTest installs a process-global mock Runtime for each run, so sessions are driven
+one after another: the timings are the per-rerun service time of one process. The
+concurrent-session estimate follows from it (Little's law): with visitors interacting
+every --think-time seconds, one process keeps up with
+    sessions = target utilization * think time / mean rerun time.
+
+    python ghpi_bench.py --sessions 50 --think-time 15 --json bench.json
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from functools import wraps
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+from ghpi_memory import rss_bytes
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'ghpi_app.py')
+
+
+# --- GEO-IP STUB ---
+class _GeoIPStub(BaseHTTPRequestHandler):
+    # ip-api.com compatible: /json/<ip> -> {"status": "success", "countryCode": ...}
+    latency = 0.0
+    country = 'GR'
+
+    def do_GET(self):
+        time.sleep(self.latency)
+        body = json.dumps({'status': 'success', 'countryCode': self.country}).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_geoip_stub(latency_ms, country):
+    _GeoIPStub.latency = latency_ms / 1000
+    _GeoIPStub.country = country
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _GeoIPStub)
+    threading.Thread(target=server.serve_forever, name='geoip-stub', daemon=True).start()
+    return server
+
+
+# --- STAGE TIMERS ---
+# The bench wraps the functions the page calls; nested calls inside one stage (e.g.
+# get_macro -> get_ghpi) are only counted once, at the outermost level.
+STAGES = {
+    'data': ('ghpi_data', ['current', 'get_ghpi', 'get_macro', 'get_kpi_table', 'kpi', 'has_regional', 'get_regional', 'regional_pivot', 'ghpi_matrix', 'sensitivity_band']),
+    'figures': ('ghpi_figures', ['get_figures', 'weights_figure', 'regional_figure']),
+    'charts': ('streamlit', ['plotly_chart']),
+    'dataframes': ('streamlit', ['dataframe']),
+}
+
+stage_times = {stage: [] for stage in STAGES}
+_stage_lock = threading.Lock()
+_depth = threading.local()
+
+
+def _timed(stage, func):
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        depth = getattr(_depth, stage, 0)
+        setattr(_depth, stage, depth + 1)
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            setattr(_depth, stage, depth)
+            if depth == 0:
+                elapsed = time.perf_counter() - start
+                with _stage_lock:
+                    stage_times[stage].append(elapsed)
+    return wrapper
+
+
+def instrument():
+    for stage, (module_name, names) in STAGES.items():
+        module = __import__(module_name)
+        for name in names:
+            setattr(module, name, _timed(stage, getattr(module, name)))
+
+
+# --- VISITOR IPS ---
+# AppTest sends no request headers, so each session's language detection is fed a
+# public X-Forwarded-For address from a pool: --ips distinct visitors, round robin.
+def feed_visitor_ips(count):
+    import ghpi_lang
+    detect_lang = ghpi_lang.detect_lang
+    counter = iter(range(sys.maxsize))
+    lock = threading.Lock()
+
+    @wraps(detect_lang)
+    def wrapper(headers, ip_address=None):
+        with lock:
+            n = next(counter) % count
+        forwarded = f'80.{106 + n // 65536}.{n // 256 % 256}.{n % 256}'
+        return detect_lang({**dict(headers or {}), 'X-Forwarded-For': forwarded}, ip_address)
+    ghpi_lang.detect_lang = wrapper
+
+
+# --- SCENARIO ---
+def run_session(timeout):
+    # One visitor: load, switch language, visit every tab, switch language back.
+    # Returns (AppTest, [(step, seconds)]); the AppTest is kept to hold its session state.
+    from streamlit.testing.v1 import AppTest
+    import ghpi_content
+    at = AppTest.from_file(APP, default_timeout=timeout)
+    steps = []
+
+    def step(name, action):
+        action()
+        start = time.perf_counter()
+        at.run()
+        steps.append((name, time.perf_counter() - start))
+        if at.exception:
+            raise RuntimeError(f"{name}: {at.exception[0].message}")
+
+    step('load', lambda: None)
+    lang = 'el' if at.session_state['lang_index'] == 0 else 'en'
+    other = 'en' if lang == 'el' else 'el'
+    step('toggle_lang', lambda: at.radio(key='lang_radio').set_value('🇬🇷 GR' if other == 'el' else '🇬🇧 EN'))
+    text = ghpi_content.CONTENT[other]
+    for tab in ('tab_methodology', 'tab_macro', 'tab_about', 'tab_data'):
+        step(tab, lambda tab=tab: at.session_state.__setitem__(f'main_tabs_{other}', text[tab]))
+    step('toggle_lang_back', lambda: at.radio(key='lang_radio').set_value('🇬🇷 GR' if lang == 'el' else '🇬🇧 EN'))
+    return at, steps
+
+
+def _summary(values):
+    ms = np.asarray(values) * 1000
+    return {'n': len(ms), 'mean_ms': round(float(ms.mean()), 2), 'p50_ms': round(float(np.percentile(ms, 50)), 2), 'p99_ms': round(float(np.percentile(ms, 99)), 2), 'max_ms': round(float(ms.max()), 2)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=20, help='sessions to simulate (default 20)')
+    parser.add_argument('--think-time', type=float, default=15, help='seconds between a visitor\'s interactions, for the capacity estimate (default 15)')
+    parser.add_argument('--utilization', type=float, default=0.7, help='target CPU utilization for the capacity estimate (default 0.7)')
+    parser.add_argument('--ips', type=int, default=50, help='distinct visitor IPs (default 50)')
+    parser.add_argument('--geoip-latency', type=float, default=50, help='geo-IP stub latency in ms (default 50)')
+    parser.add_argument('--geoip-country', default='GR', help='country the geo-IP stub answers (default GR)')
+    parser.add_argument('--timeout', type=float, default=60, help='per-rerun timeout in seconds (default 60)')
+    parser.add_argument('--json', metavar='PATH', help='also write the report as JSON')
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)  # Streamlit's bare-mode and deprecation warnings on every run
+
+    stub = start_geoip_stub(args.geoip_latency, args.geoip_country)
+    os.environ['GHPI_GEOIP_PROVIDER'] = 'ip-api'
+    os.environ['GHPI_GEOIP_URL'] = f'http://127.0.0.1:{stub.server_port}/json/{{ip}}'
+    instrument()
+    feed_visitor_ips(args.ips)
+
+    # Cold start: the first session builds the dataset generation and the figures
+    rss_start = rss_bytes()
+    start = time.perf_counter()
+    _, cold_steps = run_session(args.timeout)
+    cold = {'first_load_ms': round(cold_steps[0][1] * 1000, 2), 'first_session_ms': round((time.perf_counter() - start) * 1000, 2)}
+    for times in stage_times.values():
+        times.clear()
+
+    gc.collect()
+    rss_warm = rss_bytes()
+    start = time.perf_counter()
+    sessions = [run_session(args.timeout) for _ in range(args.sessions)]
+    wall = time.perf_counter() - start
+    gc.collect()
+    rss_end = rss_bytes()
+
+    by_step = {}
+    for _, steps in sessions:
+        for name, seconds in steps:
+            by_step.setdefault(name, []).append(seconds)
+    reruns = [seconds for _, steps in sessions for _, seconds in steps]
+    mean_rerun = sum(reruns) / len(reruns)
+    report = {
+        'sessions': args.sessions,
+        'wall_s': round(wall, 2),
+        'reruns_per_s': round(len(reruns) / wall, 2),
+        'cold': cold,
+        'reruns': _summary(reruns),
+        'steps': {name: _summary(values) for name, values in by_step.items()},
+        'stages': {stage: _summary(values) | {'total_s': round(sum(values), 3)} for stage, values in stage_times.items() if values},
+        'memory': {
+            'rss_start_mb': round(rss_start / 2**20, 1),
+            'rss_warm_mb': round(rss_warm / 2**20, 1),
+            'rss_end_mb': round(rss_end / 2**20, 1),
+            'per_session_kb': round((rss_end - rss_warm) / args.sessions / 1024, 1),
+        },
+        'capacity': {
+            'think_time_s': args.think_time,
+            'utilization': args.utilization,
+            'sessions_per_process': int(args.utilization * args.think_time / mean_rerun),
+        },
+    }
+    stub.shutdown()
+
+    print(f"{args.sessions} sessions x {len(by_step)} steps: {report['wall_s']} s, {report['reruns_per_s']} reruns/s")
+    print(f"cold start: first load {cold['first_load_ms']} ms, first session {cold['first_session_ms']} ms")
+    print(f"{'':<18}{'n':>6}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, s in [('ALL RERUNS', report['reruns'])] + list(report['steps'].items()) + [(f'[{k}]', v) for k, v in report['stages'].items()]:
+        print(f"{name:<18}{s['n']:>6}{s['p50_ms']:>10}{s['p99_ms']:>10}{s['max_ms']:>10}")
+    m = report['memory']
+    print(f"RSS: {m['rss_start_mb']} MB at start, {m['rss_warm_mb']} MB warm, {m['rss_end_mb']} MB after {args.sessions} live sessions ({m['per_session_kb']} KB/session)")
+    print(f"capacity: ~{report['capacity']['sessions_per_process']} concurrent sessions per process at {args.utilization:.0%} CPU, one interaction every {args.think_time:g} s")
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    return report
+
+
+if __name__ == '__main__':
+    main()
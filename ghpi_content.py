@@ -0,0 +1,37 @@
+import glob
+import json
+import os
+import sys
+
+# --- LOCALE CATALOG ---
+# One JSON file per language in ./locales (el.json, en.json, ...), read once per process
+# and shared by the Streamlit page and the static snapshot build (ghpi_snapshot).
+# Keys and texts are interned; the fixed HTML blocks of the page are assembled here once,
+# so a rerun only looks up ready strings whatever the number of languages.
+LOCALE_DIR = os.environ.get('GHPI_LOCALE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'locales'))
+
+SERVICE_ICONS = ['🏡', '📐', '🏗️', '🤝', '⚡', '🏨']
+
+
+def _load_locale(path):
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    return {sys.intern(key): sys.intern(value) for key, value in raw.items()}
+
+
+def _fragments(text):
+    # Ready-to-render HTML for the About tab and the sources box (the page CSS styles them)
+    return {
+        'hero': f"""<div class="hero-container"><div class="hero-title">{text['hero_title']}</div><div class="hero-subtitle">{text['hero_subtitle']}</div><div class="hero-text">{text['hero_desc']}</div></div>""",
+        'services': [
+            f"""<div class="service-card"><div class="service-icon">{icon}</div><div class="service-title">{text[f's{i}_t']}</div><div class="service-desc">{text[f's{i}_d']}</div></div>"""
+            for i, icon in enumerate(SERVICE_ICONS, start=1)
+        ],
+        'source_box': f"""<div class="source-box">{text['source_1']}<br><br>{text['source_2']}<br><br>{text['source_3']}</div>""",
+        'visit_button': f"""<div style="text-align: center; margin-top: 30px;"><a href="https://www.giakoumakis.gr" target="_blank" style="background-color: #0088C3; color: white; padding: 16px 40px; text-align: center; text-decoration: none; display: inline-block; font-size: 18px; border-radius: 50px; font-weight: bold; box-shadow: 0 4px 15px rgba(0, 136, 195, 0.4); transition: all 0.3s ease;">{text['visit_button']} 🌐</a></div>""",
+    }
+
+
+CONTENT = {os.path.splitext(os.path.basename(path))[0]: _load_locale(path) for path in sorted(glob.glob(os.path.join(LOCALE_DIR, '*.json')))}
+LANGS = tuple(CONTENT)
+FRAGMENTS = {lang: _fragments(text) for lang, text in CONTENT.items()}
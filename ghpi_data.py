@@ -0,0 +1,503 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+import ghpi_memory
+
+log = logging.getLogger(__name__)
+
+# --- SETTINGS ---
+DATA_DIR = os.environ.get('GHPI_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data'))
+STORE_DIR = os.environ.get('GHPI_STORE_DIR', os.path.join(DATA_DIR, 'store'))
+REFRESH_INTERVAL = float(os.environ.get('GHPI_REFRESH_INTERVAL', 60))  # seconds, 0 disables the watcher
+
+# Bank of Greece / Spitogatos / ELSTAT
+GHPI_WEIGHTS = (0.50, 0.30, 0.20)
+
+# --- SOURCES ---
+# name -> (file stem in DATA_DIR, value columns). Every file also carries a 'Year' column.
+SOURCES = {
+    'bog': ('bog', ['BoG_Index']),
+    'spi': ('spitogatos', ['SPI_Index']),
+    'elstat': ('elstat', ['ELSTAT_Cost']),
+    'macro': ('macro', ['GDP_Billion', 'Inflation', 'ASE_Index', 'Permits_Thous', 'FDI_RealEstate_M', 'Mortgages_New_M', 'Transactions_Thous']),
+}
+SOURCE_COLUMNS = ['BoG_Index', 'SPI_Index', 'ELSTAT_Cost']
+
+# Sources the site works without. 'regional' is long format: one row per
+# (Year, Region, Property_Type) with the three source indices.
+OPTIONAL_SOURCES = {
+    'regional': ('regional', ['Region', 'Property_Type'] + SOURCE_COLUMNS),
+}
+GROUP_COLUMNS = ['Region', 'Property_Type']
+
+
+# --- LOADERS (file extension -> parser) ---
+def _read_json(path):
+    with open(path, encoding='utf-8') as f:
+        raw = json.load(f)
+    # Either a list of records or a {column: [values]} mapping
+    return pd.DataFrame(raw)
+
+
+LOADERS = {
+    '.parquet': pd.read_parquet,
+    '.csv': pd.read_csv,
+    '.json': _read_json,
+}
+
+
+def register_loader(extension, reader):
+    # reader(path) -> DataFrame; earlier registrations win when several files share a stem
+    LOADERS[extension] = reader
+
+
+def _find_source_file(stem, required=True):
+    for extension in LOADERS:
+        path = os.path.join(DATA_DIR, stem + extension)
+        if os.path.exists(path):
+            return path
+    if not required:
+        return None
+    raise FileNotFoundError(f"No data file for '{stem}' in {DATA_DIR} ({', '.join(LOADERS)})")
+
+
+def _file_fingerprint(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 16), b''):
+            h.update(chunk)
+    return h.hexdigest()[:12]
+
+
+def _source_spec(name):
+    return SOURCES[name] if name in SOURCES else OPTIONAL_SOURCES[name]
+
+
+def _parse_source(name, path):
+    columns = _source_spec(name)[1]
+    frame = LOADERS[os.path.splitext(path)[1]](path)
+    missing = [c for c in ['Year'] + columns if c not in frame.columns]
+    if missing:
+        raise ValueError(f"{path} is missing columns: {', '.join(missing)}")
+    frame = frame[['Year'] + columns]
+    groups = [c for c in GROUP_COLUMNS if c in columns]
+    for c in groups:
+        frame[c] = frame[c].astype('category')
+    # Grouped sources are sorted group by group so group-wise ops see contiguous years
+    return frame.sort_values(groups + ['Year']).reset_index(drop=True)
+
+
+class _LoadedSource:
+    # The file is only parsed when a frame is actually needed: when the columnar
+    # store already holds this data version, startup never parses the source files.
+    def __init__(self, name, path, stat_key, fingerprint, frame=None):
+        self.name = name
+        self.path = path
+        self.stat_key = stat_key
+        self.fingerprint = fingerprint
+        self._frame = frame
+
+    @property
+    def frame(self):
+        if self._frame is None:
+            self._frame = _parse_source(self.name, self.path)
+        return self._frame
+
+
+def _load_source(name, previous=None):
+    # Re-parse only when the file changed: stat first, then content hash.
+    path = _find_source_file(_source_spec(name)[0], required=name in SOURCES)
+    if path is None:
+        return None
+    st = os.stat(path)
+    stat_key = (path, st.st_mtime_ns, st.st_size)
+    if previous is not None and previous.stat_key == stat_key:
+        return previous
+    fingerprint = _file_fingerprint(path)
+    if previous is not None and previous.path == path and previous.fingerprint == fingerprint:
+        return _LoadedSource(name, path, stat_key, fingerprint, previous._frame)
+    return _LoadedSource(name, path, stat_key, fingerprint)
+
+
+# --- COLUMNAR STORE ---
+# The default-weight df / df_macro are persisted as uncompressed Arrow IPC files with a
+# compact schema and memory-mapped back: the frames point straight into the page cache,
+# are read-only, and every session (and every server process) shares the same pages.
+GHPI_SCHEMA = pa.schema([('Year', pa.int16())] + [(c, pa.float32()) for c in ['BoG_Index', 'SPI_Index', 'ELSTAT_Cost', 'GHPI', 'YoY_Change']])
+MACRO_SCHEMA = pa.schema([('Year', pa.int16())] + [(c, pa.float32()) for c in SOURCES['macro'][1] + ['GHPI_YoY']])
+
+
+# Bump when _compute_ghpi / _compute_macro change what they produce for the same sources
+STORE_FORMAT = 1
+
+
+def _store_path(table, version, schema):
+    # Keyed on the source files (version) and on everything else the stored values depend
+    # on: the official weights, the schema and the formula, so a change to any of them is
+    # a new file instead of stale numbers from a persistent GHPI_STORE_DIR.
+    key = hashlib.sha1(repr((STORE_FORMAT, GHPI_WEIGHTS, schema.to_string())).encode()).hexdigest()[:8]
+    return os.path.join(STORE_DIR, f'{table}-{version}-{key}.arrow')
+
+
+def _write_store(path, df, schema):
+    # NaN stays a float value (not an Arrow null) so reading back needs no fill/copy
+    arrays = [pa.array(df[f.name].to_numpy(dtype=f.type.to_pandas_dtype()), type=f.type, from_pandas=False) for f in schema]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f'{path}.{os.getpid()}.tmp'
+    with pa.OSFile(tmp, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+        writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+    os.replace(tmp, path)
+    # Older versions of this table are no longer referenced by new generations
+    prefix = os.path.basename(path).split('-', 1)[0] + '-'
+    for old in os.listdir(STORE_DIR):
+        if old.startswith(prefix) and old.endswith('.arrow') and old != os.path.basename(path):
+            os.remove(os.path.join(STORE_DIR, old))
+
+
+def _read_store(path):
+    table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+    df = table.to_pandas(split_blocks=True)  # one block per column: no consolidation copy
+    df['Date'] = pd.to_datetime(df['Year'], format='%Y')
+    return df
+
+
+def plain_floats(df, decimals=4):
+    # float32 store values -> float64 in their shortest decimal form (111.4, not
+    # 111.4000015258789), for anything serialized as text (API bodies, exports)
+    floats = df.select_dtypes('floating').columns
+    return df.astype({c: 'float64' for c in floats}).round({c: decimals for c in floats})
+
+
+def _stored(table, ds, schema, build):
+    path = _store_path(table, ds.version, schema)
+    if not os.path.exists(path):
+        df = build()
+        try:
+            _write_store(path, df, schema)
+        except OSError:
+            log.exception("Could not write columnar store %s", path)
+            return df
+    return _read_store(path)
+
+
+# --- DATASET ---
+class Dataset:
+    # One immutable generation of source frames plus everything derived from them.
+    # Derived frames are shared by every session: treat them as read-only.
+    def __init__(self, sources):
+        self.sources = sources
+        self.version = hashlib.sha1(''.join(sources[n].fingerprint if sources[n] else '-' for n in sorted(sources)).encode()).hexdigest()[:12]
+        # Newest source file modification time (seconds), for HTTP Last-Modified
+        self.last_modified = max(src.stat_key[1] for src in sources.values() if src) / 1e9
+        self._derived = {}
+        self._used = {}  # key -> last access (monotonic), for memory-budget eviction
+        self.pinned = set()  # keys every page view needs (built by _warm); never evicted
+        self._lock = threading.RLock()  # builders nest (macro -> ghpi)
+
+    def derived(self, key, build):
+        value = self._derived.get(key)
+        if value is None:
+            with self._lock:
+                value = self._derived.get(key)
+                if value is None:
+                    value = build(self)
+                    self._derived[key] = value
+        self._used[key] = time.monotonic()
+        return value
+
+    def evict(self, idle=0):
+        # Drop unpinned entries not used for `idle` seconds; they are rebuilt on demand
+        cutoff = time.monotonic() - idle
+        with self._lock:
+            stale = [key for key in self._derived if key not in self.pinned and self._used.get(key, 0) <= cutoff]
+            for key in stale:
+                del self._derived[key]
+                self._used.pop(key, None)
+        return len(stale)
+
+
+# --- DATA ENGINE (GHPI) ---
+def _merged_sources(ds):
+    # Year + the three national sources, float64 as parsed (years present in all three)
+    df = ds.sources['bog'].frame
+    for name in ('spi', 'elstat'):
+        df = df.merge(ds.sources[name].frame, on='Year', how='inner')
+    return df
+
+
+def _compute_ghpi(ds, weights):
+    df = _merged_sources(ds)
+    df['Date'] = pd.to_datetime(df['Year'], format='%Y')
+
+    w_bog, w_spi, w_cost = weights
+    df['GHPI'] = (df['BoG_Index'] * w_bog) + (df['SPI_Index'] * w_spi) + (df['ELSTAT_Cost'] * w_cost)
+    df['GHPI'] = df['GHPI'].round(1)
+    df['YoY_Change'] = df['GHPI'].pct_change() * 100
+    return df
+
+
+def _build_ghpi(ds, weights):
+    if weights == GHPI_WEIGHTS:
+        return _stored('ghpi', ds, GHPI_SCHEMA, lambda: _compute_ghpi(ds, weights))
+    return _compute_ghpi(ds, weights)
+
+
+# --- DATA ENGINE (MACROECONOMIC) ---
+def _compute_macro(ds, weights):
+    df_macro = ds.sources['macro'].frame.copy()
+    df_macro['Date'] = pd.to_datetime(df_macro['Year'], format='%Y')
+    ghpi_yoy = get_ghpi(weights, ds).set_index('Year')['YoY_Change']
+    df_macro['GHPI_YoY'] = df_macro['Year'].map(ghpi_yoy)
+    return df_macro
+
+
+def _build_macro(ds, weights):
+    if weights == GHPI_WEIGHTS:
+        return _stored('macro', ds, MACRO_SCHEMA, lambda: _compute_macro(ds, weights))
+    return _compute_macro(ds, weights)
+
+
+# --- KPI SNAPSHOT TABLE ---
+# Every KPI for every series and every year, computed once per dataset generation with
+# grouped shifts / cumulative maxima. Cards and year pickers are then index lookups.
+KPI_HORIZONS = {'YoY': 1, '5Y': 5, '10Y': 10}
+
+
+def _continuous_years(long):
+    # One row per series and year from its first to its last value; missing values and
+    # missing years become NaN rows, so shift(k) below is always k years back.
+    long = long.dropna(subset=['Value'])
+    span = long.groupby('Series', sort=False)['Year'].agg(['min', 'max'])
+    lengths = (span['max'] - span['min'] + 1).to_numpy()
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    full = pd.MultiIndex.from_arrays(
+        [np.repeat(span.index.to_numpy(), lengths), np.repeat(span['min'].to_numpy(), lengths) + offsets],
+        names=['Series', 'Year'],
+    )
+    return long.set_index(['Series', 'Year']).reindex(full).reset_index()
+
+
+def _kpi_frame(long):
+    # long: Series, Year, Value sorted by (Series, Year); horizons count years back
+    out = _continuous_years(long)
+    value = out['Value']
+    by_series = out.groupby('Series', sort=False, observed=True)['Value']
+    for name, k in KPI_HORIZONS.items():
+        prev = by_series.shift(k)
+        out[f'{name}_Diff'] = value - prev
+        out[f'{name}_Pct'] = (value - prev) / prev * 100
+    out['ATH'] = by_series.cummax()  # NaN rows skipped (and NaN themselves)
+    # Year of the running peak: last year whose value equals the running maximum
+    peak_year = out['Year'].where(value == out['ATH'])
+    out['ATH_Year'] = peak_year.groupby(out['Series'], sort=False, observed=True).ffill()
+    # Only years with a value are KPI rows; each has a peak at or before it
+    out = out[value.notna()].astype({'ATH_Year': 'int64'})
+    out['Drawdown'] = out['Value'] - out['ATH']
+    out['Drawdown_Pct'] = out['Drawdown'] / out['ATH'] * 100
+    return out.set_index(['Series', 'Year']).sort_index()
+
+
+def _build_kpi_table(ds, weights):
+    df = get_ghpi(weights, ds)
+    # Back to float64 at the indices' 1-decimal precision (the store keeps float32)
+    national = df[['Year', 'GHPI'] + SOURCE_COLUMNS].astype('float64').round(1)
+    national['Year'] = national['Year'].astype('int64')
+    frames = [national.melt(id_vars='Year', var_name='Series', value_name='Value')]
+    regional = get_regional(weights, ds)
+    if regional is not None:
+        frames.append(pd.DataFrame({
+            'Year': regional['Year'].astype('int64'),
+            'Series': regional['Region'].astype(str) + ' / ' + regional['Property_Type'].astype(str),
+            'Value': regional['GHPI'],
+        }))
+    long = pd.concat(frames, ignore_index=True).sort_values(['Series', 'Year'], kind='stable')
+    return _kpi_frame(long)
+
+
+def get_kpi_table(weights=GHPI_WEIGHTS, ds=None):
+    weights = tuple(weights)
+    return (ds or current()).derived(('kpi_table', weights), lambda d: _build_kpi_table(d, weights))
+
+
+def kpi(series='GHPI', year=None, weights=GHPI_WEIGHTS, ds=None):
+    # One row of the snapshot table as a dict (year=None -> latest year of the series)
+    table = get_kpi_table(weights, ds)
+    if year is None:
+        year = table.loc[series].index[-1]
+    row = table.loc[(series, int(year))].to_dict()
+    return row | {'Series': series, 'Year': int(year), 'ATH_Year': int(row['ATH_Year'])}
+
+
+# --- WEIGHTING ENGINE ---
+# GHPI for many weight vectors at once: (years x 3 sources) @ (3 x k weightings).
+
+def source_matrix(ds=None):
+    # From the float64 source frames, as the official index is computed (not the float32
+    # store), so the default weights give exactly the official GHPI
+    ds = ds or current()
+    return ds.derived(('source_matrix',), lambda d: _merged_sources(d)[SOURCE_COLUMNS].to_numpy(dtype=np.float64))
+
+
+def ghpi_matrix(weights, ds=None):
+    # weights: (3,) -> (years,), or (k, 3) -> (years, k); same rounding as the official index
+    w = np.asarray(weights, dtype=np.float64)
+    return np.round(source_matrix(ds) @ w.T, 1)
+
+
+def yoy_matrix(ghpi):
+    # YoY % of ghpi_matrix() output, (years,) or (years, k); NaN for the first year
+    yoy = np.full(ghpi.shape, np.nan)
+    yoy[1:] = (ghpi[1:] / ghpi[:-1] - 1) * 100
+    return yoy
+
+
+def weight_grid(step=0.05):
+    # Every (BoG, SPI, ELSTAT) weighting on a `step` lattice of the simplex (weights sum to 1)
+    n = int(round(1 / step))
+    i, j = np.meshgrid(np.arange(n + 1), np.arange(n + 1), indexing='ij')
+    keep = i + j <= n
+    i, j = i[keep], j[keep]
+    return np.column_stack([i, j, n - i - j]) / n
+
+
+def sensitivity_band(step=0.05, ds=None):
+    # Per-year min / max of the GHPI across all weightings on the grid
+    ds = ds or current()
+    def build(d):
+        values = ghpi_matrix(weight_grid(step), d)
+        return values.min(axis=1), values.max(axis=1)
+    return ds.derived(('sensitivity_band', step), build)
+
+
+# --- DATA ENGINE (REGIONAL / PROPERTY TYPE) ---
+# Thousands of series in one long frame: weighting is a single matrix product over all
+# rows and YoY a single grouped pct_change, never a Python loop over series.
+def _compute_regional(ds, weights):
+    src = ds.sources['regional'].frame
+    df = src.copy()
+    df['Date'] = pd.to_datetime(df['Year'], format='%Y')
+    df['GHPI'] = np.round(src[SOURCE_COLUMNS].to_numpy(dtype=np.float64) @ np.asarray(weights, dtype=np.float64), 1)
+    # YoY against the previous row only where that row is the previous year (a gap in a
+    # series gives NaN, not a multi-year change)
+    groups = df.groupby(GROUP_COLUMNS, observed=True, sort=False)
+    consecutive = groups['Year'].diff() == 1
+    df['YoY_Change'] = ((df['GHPI'] / groups['GHPI'].shift(1) - 1) * 100).where(consecutive)
+    return df
+
+
+def has_regional(ds=None):
+    return (ds or current()).sources.get('regional') is not None
+
+
+def get_regional(weights=GHPI_WEIGHTS, ds=None):
+    ds = ds or current()
+    if not has_regional(ds):
+        return None
+    weights = tuple(weights)
+    return ds.derived(('regional', weights), lambda d: _compute_regional(d, weights))
+
+
+def regional_pivot(property_type, weights=GHPI_WEIGHTS, ds=None):
+    # Date x Region GHPI table for one property type; selecting regions is then a column slice
+    ds = ds or current()
+    weights = tuple(weights)
+    def build(d):
+        df = get_regional(weights, d)
+        df = df[df['Property_Type'] == property_type]
+        return df.pivot(index='Date', columns='Region', values='GHPI').sort_index()
+    return ds.derived(('regional_pivot', property_type, weights), build)
+
+
+def _warm(ds):
+    get_ghpi(GHPI_WEIGHTS, ds)
+    get_macro(GHPI_WEIGHTS, ds)
+    get_regional(GHPI_WEIGHTS, ds)
+    get_kpi_table(GHPI_WEIGHTS, ds)
+
+
+# --- REFRESH & ATOMIC SWAP ---
+_current = None
+_refresh_lock = threading.Lock()
+_watcher = None
+_listeners = []
+
+
+def on_refresh(callback):
+    # callback(ds) runs after a new generation is published (e.g. to rebuild snapshots)
+    _listeners.append(callback)
+    return callback
+
+
+def refresh():
+    # Reload changed sources, warm the new generation, then publish it with a single
+    # assignment. Readers see either the old or the new Dataset, never a mix.
+    global _current
+    with _refresh_lock:
+        previous = _current
+        sources = {name: _load_source(name, previous.sources[name] if previous else None) for name in [*SOURCES, *OPTIONAL_SOURCES]}
+        if previous is not None and all(sources[n] is previous.sources[n] for n in sources):
+            return previous
+        ds = Dataset(sources)
+        if previous is not None and ds.version == previous.version:
+            previous.sources = sources  # only stat info changed (e.g. touched file)
+            return previous
+        _warm(ds)
+        ds.pinned = set(ds._derived)
+        _current = ds
+        if previous is not None:
+            log.info("GHPI data reloaded: %s -> %s", previous.version, ds.version)
+        for callback in _listeners:
+            try:
+                callback(ds)
+            except Exception:
+                log.exception("GHPI refresh listener %r failed", callback)
+        return ds
+
+
+def _watch():
+    while True:
+        time.sleep(REFRESH_INTERVAL)
+        try:
+            refresh()
+        except Exception:
+            # Keep serving the last good generation if a data drop is broken
+            log.exception("GHPI data refresh failed")
+
+
+def current():
+    global _watcher
+    ds = _current
+    if ds is None:
+        ds = refresh()
+        with _refresh_lock:
+            if REFRESH_INTERVAL > 0 and _watcher is None:
+                _watcher = threading.Thread(target=_watch, name='ghpi-data-watcher', daemon=True)
+                _watcher.start()
+        ghpi_memory.start()
+    return ds
+
+
+def _evict(idle):
+    ds = _current
+    return ds.evict(idle) if ds is not None else 0
+
+
+ghpi_memory.register('dataset', _evict)
+
+
+def get_ghpi(weights=GHPI_WEIGHTS, ds=None):
+    weights = tuple(weights)
+    return (ds or current()).derived(('ghpi', weights), lambda d: _build_ghpi(d, weights))
+
+
+def get_macro(weights=GHPI_WEIGHTS, ds=None):
+    weights = tuple(weights)
+    return (ds or current()).derived(('macro', weights), lambda d: _build_macro(d, weights))
@@ -0,0 +1,90 @@
+import importlib.util
+import io
+from email.utils import formatdate
+
+from starlette.responses import Response
+from starlette.routing import Route
+
+import ghpi_api
+import ghpi_content
+import ghpi_data
+
+# --- DOWNLOADABLE EXPORTS ---
+# The full GHPI and macro tables as CSV / Excel / Parquet. Each file is serialized once
+# per dataset generation and language (Parquet keeps the raw column names, so once per
+# generation) and kept as bytes in Dataset.derived; download buttons and /export/...
+# hand out the same bytes. Excel needs openpyxl or XlsxWriter and is left out otherwise.
+EXCEL_ENGINE = next((name for name in ('openpyxl', 'xlsxwriter') if importlib.util.find_spec(name)), None)
+
+FORMATS = {
+    'csv': 'text/csv; charset=utf-8',
+    **({'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'} if EXCEL_ENGINE else {}),
+    'parquet': 'application/vnd.apache.parquet',
+}
+TABLES = ('ghpi', 'macro')
+
+
+def _labels(table, text):
+    # Column headers as on the page, in the visitor's language where the page has them
+    if table == 'ghpi':
+        return {
+            'Year': text['col_year'], 'BoG_Index': 'Bank of Greece', 'SPI_Index': 'Market Prices',
+            'ELSTAT_Cost': 'Construction Cost', 'GHPI': text['col_ghpi'], 'YoY_Change': text['col_yoy'],
+        }
+    return {
+        'Year': text['col_year'], 'GDP_Billion': text['lbl_gdp'], 'Inflation': text['lbl_inf'], 'ASE_Index': text['lbl_ase'],
+        'Permits_Thous': text['lbl_permits'], 'FDI_RealEstate_M': text['lbl_fdi'], 'Mortgages_New_M': text['lbl_mort'],
+        'Transactions_Thous': text['lbl_trans'], 'GHPI_YoY': text['lbl_ghpi_yoy'],
+    }
+
+
+def _frame(table, ds):
+    df = ghpi_data.get_ghpi(ds=ds) if table == 'ghpi' else ghpi_data.get_macro(ds=ds)
+    return ghpi_data.plain_floats(df.drop(columns=['Date']).sort_values('Year', ascending=False))
+
+
+def _build(ds, table, fmt, lang):
+    df = _frame(table, ds)
+    if fmt == 'parquet':
+        return df.to_parquet(index=False)
+    df = df.rename(columns=_labels(table, ghpi_content.CONTENT[lang]))
+    if fmt == 'csv':
+        return df.to_csv(index=False).encode('utf-8-sig')  # BOM: Excel opens Greek headers correctly
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, sheet_name=table.upper(), engine=EXCEL_ENGINE)
+    return buffer.getvalue()
+
+
+def get_export(table, fmt, lang, ds=None):
+    if table not in TABLES or fmt not in FORMATS:
+        raise ValueError(f"No '{fmt}' export for '{table}'")
+    ds = ds or ghpi_data.current()
+    key = ('export', table, fmt, None if fmt == 'parquet' else lang)
+    return ds.derived(key, lambda d: _build(d, table, fmt, lang))
+
+
+def file_name(table, fmt, lang):
+    return f"GHPI_{table}_{lang}.{fmt}" if fmt != 'parquet' else f"GHPI_{table}.{fmt}"
+
+
+# --- SERVING ---
+def export_endpoint(request):
+    # Sync: Starlette runs it in its threadpool (an XLSX build takes a while)
+    lang = request.path_params['lang']
+    table, _, fmt = request.path_params['name'].partition('.')
+    if lang not in ghpi_content.LANGS or table not in TABLES or fmt not in FORMATS:
+        return Response('Not found', status_code=404)
+    ds = ghpi_data.current()
+    etag = f'"{ds.version}-{table}-{fmt}-{lang}"'
+    headers = {
+        'ETag': etag,
+        'Last-Modified': formatdate(ds.last_modified, usegmt=True),
+        'Cache-Control': ghpi_api.CACHE_CONTROL,
+        'Content-Disposition': f'attachment; filename="{file_name(table, fmt, lang)}"',
+    }
+    if ghpi_api.not_modified(request, etag, ds.last_modified):
+        return Response(status_code=304, headers=headers)
+    return Response(get_export(table, fmt, lang, ds), media_type=FORMATS[fmt], headers=headers)
+
+
+routes = [Route('/export/{lang}/{name}', export_endpoint, methods=['GET'])]
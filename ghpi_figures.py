@@ -0,0 +1,293 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+import ghpi_analytics
+import ghpi_data
+import ghpi_memory
+
+# --- COMMON CHART SETTINGS ---
+no_zoom_config = {
+    'displayModeBar': False,
+    'scrollZoom': False,
+    'doubleClick': False,
+    'showTips': False
+}
+
+
+def common_xaxis(min_date, max_date):
+    return dict(
+        type="date",
+        range=[min_date, max_date],
+        fixedrange=True, # Lock Zoom
+        rangeselector=dict(
+            buttons=list([
+                dict(count=5, label="5Y", step="year", stepmode="backward"),
+                dict(count=10, label="10Y", step="year", stepmode="backward"),
+                dict(step="all", label="MAX")
+            ]),
+            bgcolor='#f0f2f6',
+            activecolor='#d1d5db', # Light Grey active color
+            font=dict(color='black'), # Force black text
+            x=1,
+            y=1.2,
+            xanchor='right'
+        )
+    )
+
+
+def year_slider(dates, max_date, text):
+    # "From year" slider: each step is a relayout of the x range, done by Plotly in the
+    # browser (like the rangeselector buttons), so moving it never reruns the script.
+    years = sorted(set(pd.DatetimeIndex(dates).year))
+    steps = [dict(method='relayout', label=str(year), args=[{'xaxis.range': [f'{year - 1}-07-01', max_date]}]) for year in years[:-1]]
+    return [dict(
+        steps=steps, active=0, x=0, y=0, yanchor='top', len=1, pad=dict(t=40, b=0),
+        currentvalue=dict(prefix=f"{text['lbl_from_year']}: ", font=dict(size=12)),
+        font=dict(size=10), ticklen=3, minorticklen=0,
+    )]
+
+
+# --- FIGURE FACTORY ---
+# Figures only depend on the data and on the language labels. Colours come from the
+# Streamlit theme on the client (transparent background, font colour None), so one
+# figure per (data version, language) serves both light and dark visitors. Range
+# buttons, the year slider and legend toggles all act in the browser: exploring a
+# chart never reruns the script.
+def _build_figures(ds, text):
+    df = ghpi_data.get_ghpi(ds=ds)
+    df_macro = ghpi_data.get_macro(ds=ds)
+    min_date, max_date = df['Date'].min(), df['Date'].max()
+    xaxis = common_xaxis(min_date, max_date)
+    sliders = year_slider(df['Date'], max_date, text)
+    figs = {}
+
+    # Tab 1: source comparison
+    fig_comp = go.Figure()
+    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['BoG_Index'], name='Bank of Greece', line=dict(dash='dot', width=1.5, color='#0088C3')))
+    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['SPI_Index'], name='Market Prices', line=dict(dash='dot', width=1.5, color='#EF4444')))
+    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['ELSTAT_Cost'], name='Construction Cost', line=dict(dash='dot', width=1.5, color='#10B981')))
+    fig_comp.add_trace(go.Scatter(x=df['Date'], y=df['GHPI'], name='GHPI', line=dict(color='#003B71', width=4)))
+    fig_comp.update_layout(
+        hovermode="x unified", height=530, legend=dict(orientation="h", y=1.2),
+        margin=dict(l=20, r=20, t=20, b=100), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=xaxis, yaxis=dict(fixedrange=True), sliders=sliders
+    )
+    figs['comp'] = fig_comp
+
+    # Tab 1: YoY bars. Red/green and the labels come from the values on the client (a
+    # colorscale split at 0 and a texttemplate), so no per-bar colour or text list is shipped.
+    fig_bar = go.Figure(go.Bar(
+        x=df['Date'], y=df['YoY_Change'], texttemplate='%{y:.1f}%', textposition='outside',
+        marker=dict(color=df['YoY_Change'], cmid=0, colorscale=[[0, '#EF4444'], [0.5, '#EF4444'], [0.5, '#10B981'], [1, '#10B981']], showscale=False),
+    ))
+    fig_bar.update_layout(
+        height=430, showlegend=False, margin=dict(l=20, r=20, t=20, b=100),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=xaxis, yaxis=dict(fixedrange=True), sliders=sliders
+    )
+    figs['bar'] = fig_bar
+
+    # Tab 3: GDP vs ASE. The secondary axis is laid out by hand (as make_subplots would),
+    # which keeps plotly.subplots out of the process.
+    fig_macro1 = go.Figure()
+    fig_macro1.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['GDP_Billion'], name=text['lbl_gdp'], marker_color='#003B71', opacity=0.7))
+    fig_macro1.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['ASE_Index'], name=text['lbl_ase'], line=dict(color='#FFA500', width=3), yaxis='y2'))
+    fig_macro1.update_layout(
+        height=480, margin=dict(b=110), hovermode="x unified", legend=dict(orientation="h", y=1.2),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=dict(xaxis, domain=[0, 0.94]), sliders=sliders,
+        yaxis=dict(title_text="GDP (€ Bn)", fixedrange=True),
+        yaxis2=dict(title_text="ASE Index Points", overlaying='y', side='right', anchor='x', fixedrange=True),
+    )
+    figs['macro1'] = fig_macro1
+
+    # Tab 3: permits vs transactions
+    fig_macro_act = go.Figure()
+    fig_macro_act.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['Transactions_Thous'], name=text['lbl_trans'], marker_color='#60A5FA', opacity=0.6))
+    fig_macro_act.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['Permits_Thous'], name=text['lbl_permits'], line=dict(color='#0088C3', width=3)))
+    fig_macro_act.update_layout(
+        height=480, margin=dict(b=110), hovermode="x unified", legend=dict(orientation="h", y=1.2),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        yaxis_title="Units (Thousands)",
+        dragmode=False, xaxis=xaxis, yaxis=dict(fixedrange=True), sliders=sliders
+    )
+    figs['macro_act'] = fig_macro_act
+
+    # Tab 3: FDI vs mortgages
+    fig_macro_liq = go.Figure()
+    fig_macro_liq.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['FDI_RealEstate_M'], name=text['lbl_fdi'], marker_color='#059669', opacity=0.7))
+    fig_macro_liq.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['Mortgages_New_M'], name=text['lbl_mort'], line=dict(color='#F43F5E', width=3)))
+    fig_macro_liq.update_layout(
+        height=480, margin=dict(b=110), hovermode="x unified", legend=dict(orientation="h", y=1.2),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        yaxis_title="Amount (Million €)",
+        dragmode=False, xaxis=xaxis, yaxis=dict(fixedrange=True), sliders=sliders
+    )
+    figs['macro_liq'] = fig_macro_liq
+
+    # Tab 3: inflation vs GHPI YoY
+    fig_macro2 = go.Figure()
+    fig_macro2.add_trace(go.Scatter(x=df_macro['Date'], y=df_macro['Inflation'], name=text['lbl_inf'], line=dict(color='#EF4444', width=2, dash='dot')))
+    fig_macro2.add_trace(go.Bar(x=df_macro['Date'], y=df_macro['GHPI_YoY'], name=text['lbl_ghpi_yoy'], marker_color='#10B981', opacity=0.8))
+    fig_macro2.update_layout(
+        height=480, margin=dict(b=110), hovermode="x unified", legend=dict(orientation="h", y=1.2),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        yaxis_title="Percentage (%)",
+        dragmode=False, xaxis=xaxis, yaxis=dict(fixedrange=True), sliders=sliders
+    )
+    figs['macro2'] = fig_macro2
+
+    # Tab 3: GHPI / driver correlations (ghpi_analytics)
+    analytics = ghpi_analytics.get_analytics(ds)
+    drivers = [text[DRIVER_LABELS[col]] for col in ghpi_analytics.DRIVERS]
+    lag = analytics.lag_matrix
+    figs['corr_lag'] = correlation_heatmap(
+        [f"{k:+d}" if k else "0" for k in lag.columns], drivers, lag.to_numpy(), text, texttemplate='%{z:.2f}',
+        xaxis=dict(title=text['corr_lag_axis'], type='category', fixedrange=True),
+    )
+    rolling = analytics.rolling.dropna(how='all')
+    figs['corr_rolling'] = correlation_heatmap(
+        rolling.index, drivers, rolling.to_numpy().T, text,
+        xaxis=dict(title=text['col_year'], dtick=2, fixedrange=True),
+    )
+
+    return figs
+
+
+# Driver column -> locale key of its label
+DRIVER_LABELS = {
+    'GDP_Billion': 'lbl_gdp', 'Inflation': 'lbl_inf', 'ASE_Index': 'lbl_ase', 'Permits_Thous': 'lbl_permits',
+    'FDI_RealEstate_M': 'lbl_fdi', 'Mortgages_New_M': 'lbl_mort', 'Transactions_Thous': 'lbl_trans',
+}
+
+
+def correlation_heatmap(x, y, z, text, xaxis, texttemplate=None):
+    # Diverging scale pinned to [-1, 1]: same colour means the same strength on every chart
+    fig = go.Figure(go.Heatmap(
+        x=x, y=y, z=z, zmin=-1, zmax=1, zmid=0, colorscale='RdBu', texttemplate=texttemplate,
+        colorbar=dict(title=text['lbl_corr'], thickness=12), hovertemplate='%{y}<br>%{x}: %{z:.2f}<extra></extra>',
+    ))
+    fig.update_layout(
+        height=60 + 45 * len(y), margin=dict(l=20, r=20, t=20, b=20),
+        paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=xaxis, yaxis=dict(autorange='reversed', fixedrange=True)
+    )
+    return fig
+
+
+def weights_figure(dates, official, custom, band_lo, band_hi, text):
+    # Rebuilt on every slider move: a handful of traces, no DataFrame work.
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=band_hi, line=dict(width=0), hoverinfo='skip', showlegend=False))
+    fig.add_trace(go.Scatter(x=dates, y=band_lo, name=text['lbl_band'], fill='tonexty', fillcolor='rgba(0, 136, 195, 0.15)', line=dict(width=0), hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=dates, y=official, name='GHPI', line=dict(color='#003B71', width=4)))
+    fig.add_trace(go.Scatter(x=dates, y=custom, name=text['lbl_custom'], line=dict(color='#F59E0B', width=3, dash='dash')))
+    fig.update_layout(
+        hovermode="x unified", height=400, legend=dict(orientation="h", y=1.2),
+        margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=common_xaxis(dates.min(), dates.max()), yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+def forecast_figure(history, forecast, text):
+    # history: Date-indexed GHPI; forecast: Year, Forecast, Lower, Upper of one model.
+    # The projection starts from the last observed point so the lines join.
+    last_date, last_value = history.index[-1], history.iloc[-1]
+    dates = [last_date] + list(pd.to_datetime(forecast['Year'], format='%Y'))
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=dates, y=[last_value] + list(forecast['Upper']), line=dict(width=0), hoverinfo='skip', showlegend=False))
+    fig.add_trace(go.Scatter(x=dates, y=[last_value] + list(forecast['Lower']), name=text['lbl_forecast_band'], fill='tonexty', fillcolor='rgba(245, 158, 11, 0.2)', line=dict(width=0), hoverinfo='skip'))
+    fig.add_trace(go.Scatter(x=history.index, y=history, name='GHPI', line=dict(color='#003B71', width=4)))
+    fig.add_trace(go.Scatter(x=dates, y=[last_value] + list(forecast['Forecast']), name=text['lbl_forecast'], line=dict(color='#F59E0B', width=3, dash='dash')))
+    fig.update_layout(
+        hovermode="x unified", height=400, legend=dict(orientation="h", y=1.2),
+        margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=common_xaxis(history.index.min(), dates[-1]), yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+# --- REGIONAL COMPARISON ---
+# Past these limits the chart ships aggregates instead of raw series, so the payload
+# stays bounded however many regions are selected or however long the series get.
+MAX_REGION_TRACES = 12
+MAX_POINTS = 300
+
+
+def _downsample(frame, max_points=MAX_POINTS):
+    # Average consecutive rows into at most `max_points` buckets (vectorized)
+    if len(frame) <= max_points:
+        return frame
+    buckets = np.arange(len(frame)) * max_points // len(frame)
+    out = frame.groupby(buckets).mean()
+    out.index = frame.index.to_series().groupby(buckets).first()
+    return out
+
+
+def regional_figure(pivot, regions, national, text):
+    # pivot: Date x Region GHPI (ghpi_data.regional_pivot); national: Date-indexed GHPI series
+    selected = _downsample(pivot[list(regions)])
+    national = _downsample(national.to_frame())[national.name]
+    fig = go.Figure()
+    if len(regions) > MAX_REGION_TRACES:
+        q10, q50, q90 = (selected.quantile(q, axis=1) for q in (0.1, 0.5, 0.9))
+        fig.add_trace(go.Scatter(x=selected.index, y=q90, line=dict(width=0), hoverinfo='skip', showlegend=False))
+        fig.add_trace(go.Scatter(x=selected.index, y=q10, name=text['lbl_p10_p90'], fill='tonexty', fillcolor='rgba(0, 136, 195, 0.15)', line=dict(width=0), hoverinfo='skip'))
+        fig.add_trace(go.Scatter(x=selected.index, y=q50.round(1), name=f"{text['lbl_median']} ({len(regions)})", line=dict(color='#0088C3', width=2)))
+    else:
+        for region in regions:
+            fig.add_trace(go.Scatter(x=selected.index, y=selected[region], name=str(region), line=dict(width=1.5)))
+    fig.add_trace(go.Scatter(x=national.index, y=national, name='GHPI', line=dict(color='#003B71', width=4)))
+    fig.update_layout(
+        hovermode="x unified", height=450, legend=dict(orientation="h", y=1.2),
+        margin=dict(l=20, r=20, t=20, b=20), paper_bgcolor='rgba(0,0,0,0)', plot_bgcolor='rgba(0,0,0,0)', font=dict(color=None),
+        dragmode=False, xaxis=common_xaxis(pivot.index.min(), pivot.index.max()), yaxis=dict(fixedrange=True)
+    )
+    return fig
+
+
+_figures = {}
+_figures_used = {}  # key -> last access (monotonic), for memory-budget eviction
+_figures_lock = threading.Lock()
+
+
+def get_figures(lang, text, ds=None):
+    # Figures of the caller's generation (the page passes the Dataset its frames came from,
+    # so a refresh mid-run cannot pair old tables with new charts).
+    # st.plotly_chart serializes a copy (fig.to_dict()), so the shared figures are never mutated.
+    ds = ds or ghpi_data.current()
+    key = (ds.version, lang)
+    figs = _figures.get(key)
+    if figs is None:
+        with _figures_lock:
+            figs = _figures.get(key)
+            if figs is None:
+                figs = _build_figures(ds, text)
+                # Drop figures of older data versions (a late rerun of an old generation
+                # does not evict the current one)
+                keep = {ds.version, ghpi_data.current().version}
+                for old_key in [k for k in _figures if k[0] not in keep]:
+                    del _figures[old_key]
+                    _figures_used.pop(old_key, None)
+                _figures[key] = figs
+    _figures_used[key] = time.monotonic()
+    return figs
+
+
+def _evict(idle):
+    # Figure sets (per data version and language) nobody rendered for `idle` seconds
+    cutoff = time.monotonic() - idle
+    with _figures_lock:
+        stale = [key for key in _figures if _figures_used.get(key, 0) <= cutoff]
+        for key in stale:
+            del _figures[key]
+            _figures_used.pop(key, None)
+    return len(stale)
+
+
+ghpi_memory.register('figures', _evict)
@@ -0,0 +1,360 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+import ghpi_data
+
+log = logging.getLogger(__name__)
+
+# --- SETTINGS ---
+HORIZON = int(os.environ.get('GHPI_FORECAST_HORIZON', 3))  # years ahead
+WORKERS = int(os.environ.get('GHPI_FORECAST_WORKERS', 1))  # fit processes, 0 = a background thread
+FIT_TIMEOUT = float(os.environ.get('GHPI_FORECAST_TIMEOUT', 120))  # seconds before a fit counts as failed
+BAND = (10, 90)  # percentiles of the forecast band
+SIMULATIONS = 2000
+DRIVERS = ['Mortgages_New_M', 'Transactions_Thous', 'Inflation']
+
+# --- FORECASTING ---
+# Lightweight NumPy models of the annual GHPI, fitted off the request path: a new data
+# generation schedules one fit in a worker process, the result (parameters, forecast and
+# band per model) is kept per data version in memory and as JSON next to the columnar
+# store, and the page only ever reads it.
+#   ets:   damped Holt trend on log GHPI (grid-searched smoothing parameters)
+#   ar:    AR(1) on annual log growth
+#   macro: one-year nowcast from last year's growth in mortgages and transactions,
+#          inflation and the index's own growth (OLS)
+MODELS = ('ets', 'ar', 'macro')
+MODEL_VERSION = 1  # bump when a model changes, so cached results are not reused
+
+
+def _growth(values):
+    # Annual log growth in %; NaN where either year is not positive
+    values = np.asarray(values, dtype=np.float64)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.diff(np.log(np.where(values > 0, values, np.nan))) * 100
+
+
+def _band(paths):
+    lo, mid, hi = np.percentile(paths, [BAND[0], 50, BAND[1]], axis=0)
+    return lo, mid, hi
+
+
+def _fit_ar(level, horizon, rng):
+    g = _growth(level)
+    X = np.column_stack([np.ones(len(g) - 1), g[:-1]])
+    (c, phi), *_ = np.linalg.lstsq(X, g[1:], rcond=None)
+    phi = float(np.clip(phi, -0.98, 0.98))
+    resid = g[1:] - (c + phi * g[:-1])
+    sigma = float(resid.std(ddof=2))
+    paths = np.empty((SIMULATIONS, horizon))
+    last_g, last_level = np.full(SIMULATIONS, g[-1]), np.full(SIMULATIONS, level[-1])
+    for h in range(horizon):
+        last_g = c + phi * last_g + rng.normal(0, sigma, SIMULATIONS)
+        last_level = last_level * np.exp(last_g / 100)
+        paths[:, h] = last_level
+    rmse = float(np.sqrt(np.mean((level[2:] - level[1:-1] * np.exp((c + phi * g[:-1]) / 100)) ** 2)))
+    return {'c': float(c), 'phi': phi, 'sigma': sigma}, rmse, paths
+
+
+def _holt(y, alpha, beta, phi):
+    # One-step-ahead errors of a damped additive trend on y; returns (errors, level, trend)
+    level, trend = y[0], y[1] - y[0]
+    errors = np.empty(len(y) - 1)
+    for t in range(1, len(y)):
+        forecast = level + phi * trend
+        errors[t - 1] = y[t] - forecast
+        level, trend = forecast + alpha * errors[t - 1], phi * trend + alpha * beta * errors[t - 1]
+    return errors, level, trend
+
+
+def _fit_ets(level, horizon, rng):
+    y = np.log(level)
+    grid = [(a, b, p) for a in np.linspace(0.1, 1.0, 10) for b in np.linspace(0.05, 0.5, 10) for p in (0.8, 0.9, 0.95, 0.98)]
+    sse = [float(np.sum(_holt(y, *params)[0][1:] ** 2)) for params in grid]
+    alpha, beta, phi = grid[int(np.argmin(sse))]
+    errors, l, b = _holt(y, alpha, beta, phi)
+    sigma = float(errors[1:].std(ddof=3))
+    paths = np.empty((SIMULATIONS, horizon))
+    l, b = np.full(SIMULATIONS, l), np.full(SIMULATIONS, b)
+    for h in range(horizon):
+        e = rng.normal(0, sigma, SIMULATIONS)
+        forecast = l + phi * b
+        paths[:, h] = np.exp(forecast + e)
+        l, b = forecast + e * alpha, phi * b + alpha * beta * e
+    rmse = float(np.sqrt(np.mean((level[2:] - np.exp(y[2:] - errors[1:])) ** 2)))
+    return {'alpha': float(alpha), 'beta': float(beta), 'phi': float(phi), 'sigma': sigma}, rmse, paths
+
+
+def _fit_macro(level, drivers, rng):
+    # g_t on [1, mortgages growth, transactions growth, inflation, g] at t-1; one step ahead
+    g = _growth(level)
+    features = np.column_stack([_growth(drivers[:, 0]), _growth(drivers[:, 1]), drivers[1:, 2], g])
+    x_next = np.concatenate([[1.0], features[-1]])
+    if not np.all(np.isfinite(x_next)):
+        raise ValueError("latest driver values are missing or not positive")
+    # Years with a missing or non-positive driver are left out of the regression
+    X = np.column_stack([np.ones(len(g) - 1), features[:-1]])
+    rows = np.all(np.isfinite(X), axis=1)
+    X, level_prev, level_next, y = X[rows], level[1:-1][rows], level[2:][rows], g[1:][rows]
+    if len(y) < X.shape[1] + 2:
+        raise ValueError(f"only {len(y)} usable years for the driver regression")
+    beta, *_ = np.linalg.lstsq(X, y, rcond=None)
+    resid = y - X @ beta
+    sigma = float(np.sqrt(resid @ resid / (len(resid) - X.shape[1])))
+    leverage = float(x_next @ np.linalg.pinv(X.T @ X) @ x_next)
+    growth = x_next @ beta + rng.normal(0, sigma * np.sqrt(1 + leverage), SIMULATIONS)
+    paths = (level[-1] * np.exp(growth / 100))[:, None]
+    params = dict(zip(['const', 'mortgages_growth', 'transactions_growth', 'inflation', 'ghpi_growth'], map(float, beta)))
+    return params | {'sigma': sigma}, float(np.sqrt(np.mean((level_next - level_prev * np.exp((X @ beta) / 100)) ** 2))), paths
+
+
+def fit_all(inputs, horizon):
+    # Runs in the worker: plain lists in, JSON-ready dict out (seeded, so reproducible).
+    # rmse: one-step-ahead in-sample error of each model, in index points. A model that
+    # cannot be fitted on this data is left out (reason in 'errors'); none at all raises.
+    years = np.asarray(inputs['years'])
+    level = np.asarray(inputs['ghpi'], dtype=np.float64)
+    drivers = np.asarray(inputs['drivers'], dtype=np.float64)
+    if len(level) < 5 or not np.all(np.isfinite(level) & (level > 0)):
+        raise ValueError("the GHPI series needs at least 5 positive values")
+    rng = np.random.default_rng(0)
+    fitters = {
+        'ets': lambda: _fit_ets(level, horizon, rng),
+        'ar': lambda: _fit_ar(level, horizon, rng),
+        'macro': lambda: _fit_macro(level, drivers, rng),
+    }
+    models, errors = {}, {}
+    for name, fit in fitters.items():
+        try:
+            params, rmse, paths = fit()
+        except (ValueError, np.linalg.LinAlgError) as e:
+            errors[name] = str(e)
+            continue
+        if not np.all(np.isfinite(paths)):
+            errors[name] = "non-finite forecast"
+            continue
+        lo, mid, hi = _band(paths)
+        models[name] = {
+            'params': params,
+            'rmse': round(rmse, 3),
+            'forecast': [
+                {'Year': int(years[-1] + h + 1), 'Forecast': round(float(mid[h]), 1), 'Lower': round(float(lo[h]), 1), 'Upper': round(float(hi[h]), 1)}
+                for h in range(paths.shape[1])
+            ],
+        }
+    if not models:
+        raise ValueError(f"no model could be fitted: {errors}")
+    return {'version': inputs['version'], 'horizon': horizon, 'last_year': int(years[-1]), 'models': models, 'errors': errors}
+
+
+def _inputs(ds):
+    df = ghpi_data.get_ghpi(ds=ds)
+    macro = ghpi_data.get_macro(ds=ds).set_index('Year')
+    # Years present in both tables (the driver regression needs them aligned)
+    years = [int(y) for y in df['Year'] if y in macro.index]
+    ghpi = df.set_index('Year').loc[years, 'GHPI'].astype('float64')
+    return {
+        'version': ds.version,
+        'years': years,
+        'ghpi': ghpi.tolist(),
+        'drivers': macro.loc[years, DRIVERS].astype('float64').to_numpy().tolist(),
+    }
+
+
+# --- CACHE & SCHEDULING ---
+_results = {}  # data version -> fit_all() result (the last KEEP versions)
+_failed = {}  # data version -> why its fit failed (not retried for that version)
+KEEP = 2
+_futures = {}  # data version -> (pending Future, monotonic submit time)
+_lock = threading.RLock()  # _expire's pool shutdown runs _done callbacks in place
+
+
+def _cache_path(version):
+    # Keyed on the data and on the model code and settings, so a persistent store never
+    # hands out a forecast made by other models
+    key = hashlib.sha1(repr((MODEL_VERSION, HORIZON, SIMULATIONS, BAND, DRIVERS)).encode()).hexdigest()[:8]
+    return os.path.join(ghpi_data.STORE_DIR, f'forecast-{version}-{key}.json')
+
+
+def _read_cache(version):
+    try:
+        with open(_cache_path(version), encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(result):
+    path = _cache_path(result['version'])
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f'{path}.{os.getpid()}.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp, path)
+        for old in os.listdir(ghpi_data.STORE_DIR):
+            if old.startswith('forecast-') and old.endswith('.json') and old != os.path.basename(path):
+                os.remove(os.path.join(ghpi_data.STORE_DIR, old))
+    except OSError:
+        log.exception("Could not write forecast cache %s", path)
+
+
+def _new_pool():
+    # 'forkserver': workers are forked from a fresh single-threaded server process, never
+    # from this threaded one. A worker launched after the first page run would re-import
+    # sys.modules['__main__'], which Streamlit points at the page script, so all of them
+    # are launched here (while none is idle, each submit launches one more); start() runs
+    # before the server accepts connections.
+    if WORKERS <= 0:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix='ghpi-forecast')
+    context = multiprocessing.get_context('forkserver')
+    context.set_forkserver_preload(['ghpi_forecast'])
+    pool = ProcessPoolExecutor(max_workers=WORKERS, mp_context=context)
+    for future in [pool.submit(os.getpid) for _ in range(WORKERS)]:
+        future.result()
+    return pool
+
+
+_pool = None  # created by start(); without it fits run in _fallback
+
+
+def _fallback():
+    # A background thread: no fork in the page path (AppTest, `streamlit run ghpi_app.py`,
+    # or after a timeout took the process pool down)
+    global _pool
+    _pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ghpi-forecast')
+    return _pool
+
+
+def start():
+    # Called from the st.App lifespan (ghpi_startup), before the first page run
+    global _pool
+    with _lock:
+        if _pool is None:
+            _pool = _new_pool()
+
+
+def stop():
+    global _pool
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+def _keep(mapping, version, value):
+    mapping[version] = value
+    for old in list(mapping)[:-KEEP]:
+        del mapping[old]
+
+
+def _done(version, future):
+    with _lock:
+        if _futures.get(version, (None,))[0] is future:
+            del _futures[version]
+        if version in _failed or future.cancelled():
+            return  # already given up on (timeout), or cancelled with a replaced pool: retried
+        try:
+            result = future.result()
+        except Exception as e:
+            log.error("GHPI forecast fit failed for data version %s: %r", version, e)
+            _keep(_failed, version, repr(e))
+            return
+        _keep(_results, version, result)
+    _write_cache(result)
+
+
+def _expire():
+    # Under _lock: fail fits running past FIT_TIMEOUT. A hung worker would hold its slot
+    # forever, so the process pool is shut down (its workers killed); later fits run in
+    # _fallback() until the next start, as a new pool cannot be forked from here.
+    global _pool
+    now = time.monotonic()
+    stuck = [version for version, (_, started) in _futures.items() if now - started > FIT_TIMEOUT]
+    if not stuck:
+        return
+    for version in stuck:
+        del _futures[version]
+        log.error("GHPI forecast fit for data version %s timed out after %.0f s", version, FIT_TIMEOUT)
+        _keep(_failed, version, f"timed out after {FIT_TIMEOUT:.0f} s")
+    if isinstance(_pool, ProcessPoolExecutor):
+        for process in list((getattr(_pool, '_processes', None) or {}).values()):
+            process.kill()
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+        log.warning("GHPI forecast process pool shut down; fits run in a thread until restart")
+
+
+def schedule(ds=None):
+    # Make sure a fit for this generation exists, is running or has failed; never waits
+    ds = ds or ghpi_data.current()
+    with _lock:
+        _expire()
+        if ds.version in _results or ds.version in _futures or ds.version in _failed:
+            return
+        cached = _read_cache(ds.version)
+        if cached is not None:
+            _keep(_results, ds.version, cached)
+            return
+        future = (_pool or _fallback()).submit(fit_all, _inputs(ds), HORIZON)
+        _futures[ds.version] = (future, time.monotonic())
+    future.add_done_callback(lambda f, version=ds.version: _done(version, f))
+
+
+ghpi_data.on_refresh(schedule)
+
+
+def get_result(ds=None):
+    # The fit for this generation, or None while it is still running or if it failed
+    ds = ds or ghpi_data.current()
+    result = _results.get(ds.version)
+    if result is None:
+        schedule(ds)
+    return result
+
+
+def failed(ds=None):
+    # Why this generation has no forecast (None: ready or still running)
+    ds = ds or ghpi_data.current()
+    return _failed.get(ds.version)
+
+
+def get_forecast(ds=None):
+    # Model, Year, Forecast, Lower, Upper for every model (None while fitting or failed)
+    ds = ds or ghpi_data.current()
+    result = get_result(ds)
+    if result is None:
+        return None
+    return ds.derived(('forecast', HORIZON), lambda d: pd.DataFrame([
+        {'Model': name} | row for name, model in result['models'].items() for row in model['forecast']
+    ]))
+
+
+def wait(ds=None, timeout=FIT_TIMEOUT):
+    # Used by the boot warm-up: block until this generation's fit is done (or failed, or
+    # `timeout` passed); returns the result or None
+    ds = ds or ghpi_data.current()
+    schedule(ds)
+    pending = _futures.get(ds.version)
+    if pending is not None:
+        try:
+            pending[0].result(timeout)
+        except Exception:
+            pass  # recorded by _done, or left to the timeout check
+    return get_result(ds)
+
+
+if __name__ == '__main__':
+    result = fit_all(_inputs(ghpi_data.current()), HORIZON)
+    for name, model in result['models'].items():
+        print(name, model['params'], 'rmse', model['rmse'])
+        for row in model['forecast']:
+            print('   ', row)
@@ -0,0 +1,170 @@
+import ipaddress
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import ghpi_metrics
+
+# --- SETTINGS ---
+# GHPI_GEOIP_PROVIDER: 'ip-api' (default) or 'offline' (no network, see _offline_country)
+GEOIP_PROVIDER = os.environ.get('GHPI_GEOIP_PROVIDER', 'ip-api')
+GEOIP_URL = os.environ.get('GHPI_GEOIP_URL', 'http://ip-api.com/json/{ip}')  # ip-api compatible endpoint
+GEOIP_TTL = float(os.environ.get('GHPI_GEOIP_TTL', 24 * 3600))
+GEOIP_MAX_ENTRIES = int(os.environ.get('GHPI_GEOIP_MAX_ENTRIES', 4096))
+GEOIP_TIMEOUT = 2
+GEOIP_BACKOFF = 60  # seconds to stay off ip-api.com after a 429
+
+_MISSING = object()
+
+
+class TTLCache:
+    # Thread-safe LRU map whose entries also expire after `ttl` seconds.
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, default=_MISSING):
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                return default
+            value, expires = item
+            if expires < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def __len__(self):
+        return len(self._data)
+
+
+# --- PROCESS-WIDE STATE (shared by every session) ---
+country_cache = TTLCache(GEOIP_MAX_ENTRIES, GEOIP_TTL)
+
+_http = None  # requests.Session, created by the first lookup (off the request path)
+_http_lock = threading.Lock()
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='ghpi-geoip')
+_pending = set()
+_pending_lock = threading.Lock()
+_backoff_until = 0.0
+
+
+# --- PROVIDERS (ip -> ISO country code or None) ---
+def _session():
+    # `requests` is only imported here, in a geo-IP worker thread: the page never needs it
+    # for the first paint, and the offline provider never needs it at all.
+    global _http
+    with _http_lock:
+        if _http is None:
+            import requests
+            from requests.adapters import HTTPAdapter
+            _http = requests.Session()
+            _http.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+    return _http
+
+
+def _ip_api_country(ip):
+    global _backoff_until
+    if time.monotonic() < _backoff_until:
+        return _MISSING
+    response = _session().get(GEOIP_URL.format(ip=ip), params={'fields': 'status,countryCode'}, timeout=GEOIP_TIMEOUT)
+    if response.status_code == 429:
+        _backoff_until = time.monotonic() + GEOIP_BACKOFF
+        return _MISSING
+    if response.status_code != 200:
+        return _MISSING
+    return response.json().get('countryCode')
+
+
+def _offline_country(ip):
+    # Local stand-in for development, tests and load runs: never touches the network.
+    return os.environ.get('GHPI_GEOIP_OFFLINE_COUNTRY') or None
+
+
+PROVIDERS = {
+    'ip-api': _ip_api_country,
+    'offline': _offline_country,
+}
+
+
+def _resolve(ip):
+    try:
+        with ghpi_metrics.section('geoip_lookup'):
+            country = PROVIDERS.get(GEOIP_PROVIDER, _offline_country)(ip)
+        if country is not _MISSING:
+            country_cache.set(ip, country)
+    except Exception:
+        pass
+    finally:
+        with _pending_lock:
+            _pending.discard(ip)
+
+
+# --- DETECTION ---
+def lang_from_accept_language(header):
+    # 'el' if Greek is the preferred language, 'en' if Greek is not listed, None if undecided.
+    if not header:
+        return None
+    tags = []
+    for i, part in enumerate(header.split(',')):
+        tag, _, params = part.strip().partition(';')
+        q = 1.0
+        if params.strip().startswith('q='):
+            try: q = float(params.strip()[2:])
+            except ValueError: q = 0.0
+        if tag and q > 0:
+            tags.append((-q, i, tag.strip().lower()))
+    if not tags:
+        return None
+    tags.sort()
+    is_greek = [tag.split('-')[0] == 'el' or tag.endswith('-gr') for _, _, tag in tags]
+    if is_greek[0]: return 'el'
+    if not any(is_greek): return 'en'
+    return None
+
+
+def client_ip(headers, ip_address=None):
+    # Behind the Heroku router the visitor is the first X-Forwarded-For hop.
+    forwarded = (headers or {}).get('X-Forwarded-For', '')
+    candidate = forwarded.split(',')[0].strip() or ip_address
+    try:
+        ip = ipaddress.ip_address(candidate)
+    except (TypeError, ValueError):
+        return None
+    if ip.is_private or ip.is_loopback or ip.is_reserved:
+        return None
+    return str(ip)
+
+
+def lang_from_ip(ip):
+    # Cache hit -> answer now; miss -> resolve in the background for the next session from this IP.
+    if ip is None:
+        return None
+    country = country_cache.get(ip)
+    if country is not _MISSING:
+        return 'el' if country == 'GR' else 'en'
+    with _pending_lock:
+        if ip not in _pending:
+            _pending.add(ip)
+            _executor.submit(_resolve, ip)
+    return None
+
+
+def detect_lang(headers, ip_address=None):
+    headers = headers or {}
+    lang = lang_from_accept_language(headers.get('Accept-Language'))
+    if lang is None:
+        lang = lang_from_ip(client_ip(headers, ip_address))
+    return lang
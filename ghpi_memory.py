@@ -0,0 +1,83 @@
+import ctypes
+import ctypes.util
+import gc
+import logging
+import os
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# --- SETTINGS ---
+# GHPI_MEMORY_BUDGET_MB: resident memory the process should stay under (0 disables the
+# check). Past it, cached artifacts nobody used for GHPI_MEMORY_IDLE seconds are dropped
+# first, then every artifact that can be rebuilt on demand.
+MEMORY_BUDGET_MB = float(os.environ.get('GHPI_MEMORY_BUDGET_MB', 400))  # eco dyno: 512 MB
+MEMORY_IDLE = float(os.environ.get('GHPI_MEMORY_IDLE', 300))
+CHECK_INTERVAL = float(os.environ.get('GHPI_MEMORY_CHECK_INTERVAL', 15))
+
+_evictors = []  # (name, evict(idle_seconds) -> number of entries dropped)
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def rss_bytes():
+    # Current resident set size (Linux /proc); peak RSS where /proc is not available
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _malloc_trim():
+    # Hand freed heap pages back to the OS (glibc keeps them otherwise)
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c'))
+        libc.malloc_trim(0)
+    except (OSError, AttributeError, TypeError):
+        pass
+
+
+def register(name, evict):
+    # evict(idle_seconds): drop entries unused for that long (0 -> everything droppable)
+    _evictors.append((name, evict))
+    return evict
+
+
+def start():
+    # Background budget check; started with the data watcher (ghpi_data.current)
+    global _watcher
+    with _watcher_lock:
+        if MEMORY_BUDGET_MB > 0 and CHECK_INTERVAL > 0 and _watcher is None:
+            _watcher = threading.Thread(target=_watch, name='ghpi-memory-watcher', daemon=True)
+            _watcher.start()
+
+
+def enforce(budget_mb=None):
+    # Returns the number of evicted entries (0 when already under budget)
+    budget = (MEMORY_BUDGET_MB if budget_mb is None else budget_mb) * 2**20
+    before = rss_bytes()
+    if budget <= 0 or before <= budget:
+        return 0
+    evicted = 0
+    for idle in (MEMORY_IDLE, 0):
+        for name, evict in _evictors:
+            evicted += evict(idle)
+        gc.collect()
+        _malloc_trim()
+        if rss_bytes() <= budget:
+            break
+    log.warning("Memory budget %.0f MB exceeded (%.0f MB): evicted %d cached artifacts, now %.0f MB",
+                budget / 2**20, before / 2**20, evicted, rss_bytes() / 2**20)
+    return evicted
+
+
+def _watch():
+    while True:
+        time.sleep(CHECK_INTERVAL)
+        try:
+            enforce()
+        except Exception:
+            log.exception("Memory budget check failed")
@@ -0,0 +1,129 @@
+import bisect
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from starlette.responses import Response
+from starlette.routing import Route
+
+log = logging.getLogger(__name__)
+
+# --- SETTINGS ---
+# GHPI_METRICS=1 turns the section timers on (off by default: section() is then a
+# shared no-op context). GHPI_METRICS_LOG=1 also logs one line per page run.
+ENABLED = os.environ.get('GHPI_METRICS', '0') == '1'
+LOG_RUNS = ENABLED and os.environ.get('GHPI_METRICS_LOG', '0') == '1'
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+if LOG_RUNS and not log.handlers:
+    log.addHandler(logging.StreamHandler())
+    log.setLevel(logging.INFO)
+
+
+class Histogram:
+    # Cumulative-bucket latency histogram in the Prometheus exposition model
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.sum += seconds
+        self.count += 1
+
+
+# --- PROCESS-WIDE REGISTRY ---
+sections = {}  # section name -> Histogram
+runs = Histogram()  # whole page runs (start_run -> end_run)
+_lock = threading.Lock()
+_local = threading.local()  # the page run on this script thread, for LOG_RUNS
+
+
+def observe(name, seconds):
+    with _lock:
+        histogram = sections.get(name)
+        if histogram is None:
+            histogram = sections[name] = Histogram()
+        histogram.observe(seconds)
+    run = getattr(_local, 'run', None)
+    if run is not None:
+        run[name] = run.get(name, 0.0) + seconds
+
+
+class _Section:
+    __slots__ = ('name', 'start')
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc):
+        observe(self.name, time.perf_counter() - self.start)
+
+
+_NOOP = nullcontext()
+
+
+def section(name):
+    # with ghpi_metrics.section('data'): ...
+    return _Section(name) if ENABLED else _NOOP
+
+
+def start_run():
+    if ENABLED:
+        _local.start = time.perf_counter()
+        _local.run = {} if LOG_RUNS else None
+
+
+def end_run():
+    # Runs stopped by a rerun or an exception never get here and are not counted
+    start = getattr(_local, 'start', None)
+    if not ENABLED or start is None:
+        return
+    total = time.perf_counter() - start
+    with _lock:
+        runs.observe(total)
+    if LOG_RUNS and _local.run is not None:
+        log.info('ghpi_run total_ms=%.1f %s', total * 1000, ' '.join(f'{name}_ms={seconds * 1000:.1f}' for name, seconds in _local.run.items()))
+    _local.start = _local.run = None
+
+
+# --- PROMETHEUS EXPOSITION ---
+def _histogram_lines(metric, histogram, labels=''):
+    lines, cumulative = [], 0
+    sep = ',' if labels else ''
+    for bound, count in zip([*(f'{b:g}' for b in BUCKETS), '+Inf'], histogram.counts):
+        cumulative += count
+        lines.append(f'{metric}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}')
+    suffix = f'{{{labels}}}' if labels else ''
+    lines.append(f'{metric}_sum{suffix} {histogram.sum:.6f}')
+    lines.append(f'{metric}_count{suffix} {histogram.count}')
+    return lines
+
+
+def render():
+    with _lock:
+        lines = [
+            '# HELP ghpi_run_seconds Full runs of ghpi_app.py',
+            '# TYPE ghpi_run_seconds histogram',
+            *_histogram_lines('ghpi_run_seconds', runs),
+            '# HELP ghpi_section_seconds Time spent per section of ghpi_app.py',
+            '# TYPE ghpi_section_seconds histogram',
+        ]
+        for name in sorted(sections):
+            lines += _histogram_lines('ghpi_section_seconds', sections[name], f'section="{name}"')
+    return '\n'.join(lines) + '\n'
+
+
+async def metrics_endpoint(request):
+    if not ENABLED:
+        return Response('Metrics are disabled (set GHPI_METRICS=1)', status_code=404)
+    return Response(render(), media_type='text/plain; version=0.0.4; charset=utf-8', headers={'Cache-Control': 'no-store'})
+
+
+routes = [Route('/metrics', metrics_endpoint, methods=['GET'])]
@@ -0,0 +1,21 @@
+import streamlit as st
+from starlette.middleware import Middleware
+
+import ghpi_api
+import ghpi_exports
+import ghpi_metrics
+import ghpi_snapshot
+import ghpi_startup
+
+# --- SERVER ENTRY POINT ---
+# The Streamlit page plus, on the same port and the same ghpi_data cache: the headless
+# data API (/api/...), table downloads (/export/<lang>/<table>.<fmt>), static snapshots
+# (/snapshot/<lang>, and "/" for crawlers) and /metrics when GHPI_METRICS=1. Data and
+# figure caches are warmed at boot, before the first connection is served (ghpi_startup).
+# `streamlit run ghpi_server.py` detects the ASGI app below.
+app = st.App(
+    "ghpi_app.py",
+    lifespan=ghpi_startup.lifespan,
+    routes=ghpi_api.routes + ghpi_exports.routes + ghpi_snapshot.routes + ghpi_metrics.routes,
+    middleware=[Middleware(ghpi_snapshot.CrawlerSnapshotMiddleware)],
+)
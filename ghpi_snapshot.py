@@ -0,0 +1,261 @@
+import html
+import os
+import re
+import textwrap
+import threading
+
+import plotly.offline
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Route
+
+import ghpi_content
+import ghpi_data
+import ghpi_figures
+import ghpi_lang
+
+# --- STATIC SNAPSHOTS ---
+# Plain HTML renderings of the GR and EN pages (KPIs, tables, methodology, charts as
+# embedded Plotly JSON), rebuilt whenever the data changes. Crawlers requesting "/" and
+# anyone opening /snapshot/<lang> get the file directly: no Streamlit session at all.
+SNAPSHOT_DIR = os.environ.get('GHPI_SNAPSHOT_DIR', os.path.join(ghpi_data.DATA_DIR, 'snapshots'))
+LANGS = ghpi_content.LANGS
+BOT_PATTERN = re.compile(r'bot|crawl|spider|slurp|facebookexternalhit|embedly|preview|whatsapp|telegram|lighthouse', re.I)
+PLOTLY_JS = f'https://cdn.plot.ly/plotly-{plotly.offline.get_plotlyjs_version()}.min.js'
+
+_build_lock = threading.RLock()
+
+_CSS = """
+body { font-family: system-ui, -apple-system, "Segoe UI", Roboto, sans-serif; margin: 0 auto; max-width: 1100px; padding: 1rem; color: #1f2937; }
+header { display: flex; align-items: center; gap: 25px; }
+header img { height: 110px; }
+h1 { font-size: 2.4rem; margin: 0; }
+.subtitle { font-size: 1.4rem; color: #0088C3; font-weight: 600; }
+.intro { font-style: italic; opacity: 0.8; margin: 20px 0 30px; }
+.kpis { display: grid; grid-template-columns: repeat(auto-fit, minmax(200px, 1fr)); gap: 12px; }
+.kpi { border: 1px solid rgba(128,128,128,0.2); border-radius: 5px; padding: 15px; background: #f0f2f6; }
+.kpi b { display: block; font-size: 1.8rem; }
+table { border-collapse: collapse; width: 100%; font-size: 0.9rem; }
+th, td { padding: 4px 8px; border-bottom: 1px solid rgba(128,128,128,0.2); text-align: right; }
+.source-box { background: #f0f2f6; padding: 15px; border-radius: 8px; border-left: 5px solid #003B71; }
+.services { display: grid; grid-template-columns: repeat(auto-fit, minmax(220px, 1fr)); gap: 12px; }
+.service { border: 1px solid rgba(128,128,128,0.2); border-radius: 12px; padding: 20px; text-align: center; }
+a { color: #0088C3; }
+footer { text-align: center; color: grey; font-size: 0.8rem; margin-top: 30px; }
+"""
+
+
+def _md(source):
+    # The small Markdown subset used in ghpi_content: paragraphs, '* ' bullets, **bold**
+    out = []
+    for block in re.split(r'\n\s*\n', textwrap.dedent(source).strip()):
+        lines, items = [], []
+        for line in block.splitlines():
+            line = re.sub(r'\*\*(.+?)\*\*', r'<strong>\1</strong>', html.escape(line.strip()))
+            if line.startswith('* '):
+                items.append(line[2:])
+            elif line:
+                lines.append(line)
+        if lines:
+            out.append(f'<p>{" ".join(lines)}</p>')
+        if items:
+            out.append('<ul>' + ''.join(f'<li>{i}</li>' for i in items) + '</ul>')
+    return '\n'.join(out)
+
+
+def _table(df, columns):
+    head = ''.join(f'<th>{html.escape(label)}</th>' for label, _, _ in columns)
+    rows = []
+    for row in df.itertuples(index=False):
+        cells = ''.join(f'<td>{fmt.format(getattr(row, col)) if getattr(row, col) == getattr(row, col) else "–"}</td>' for _, col, fmt in columns)
+        rows.append(f'<tr>{cells}</tr>')
+    return f'<table><thead><tr>{head}</tr></thead><tbody>{"".join(rows)}</tbody></table>'
+
+
+def _chart(fig, chart_id):
+    return f'<div id="{chart_id}"></div><script>(function(){{var f={fig.to_json()};Plotly.newPlot("{chart_id}",f.data,f.layout,{{displayModeBar:false,responsive:true}});}})();</script>'
+
+
+def _links(lang, base='', root=False):
+    # Canonical plus the hreflang set: each language at the /snapshot/<lang> URL that always
+    # returns it, "/" (language by Accept-Language, else EN) as x-default. Files keep them
+    # site-relative; the served copy gets them absolute (see _body).
+    canonical = f'{base}/' if root else f'{base}/snapshot/{lang}'
+    return '\n'.join([f'<link rel="canonical" href="{canonical}">']
+                     + [f'<link rel="alternate" hreflang="{code}" href="{base}/snapshot/{code}">' for code in LANGS]
+                     + [f'<link rel="alternate" hreflang="x-default" href="{base}/">'])
+
+
+def render(lang, ds=None):
+    ds = ds or ghpi_data.current()
+    text = ghpi_content.CONTENT[lang]
+    e = html.escape
+    df = ghpi_data.get_ghpi(ds=ds)
+    df_macro = ghpi_data.get_macro(ds=ds)
+    k = ghpi_data.kpi('GHPI', ds=ds)
+    figs = ghpi_figures.get_figures(lang, text, ds)
+    pct = lambda x: f'{x:.1f}%' if x == x else '–'
+
+    kpis = ''.join(f'<div class="kpi">{e(label)}<b>{value}</b>{e(delta)}</div>' for label, value, delta in [
+        (text['stat_current'].format(year=k['Year']), k['Value'], ''),
+        (text['stat_yoy'], pct(k['YoY_Pct']), f"{k['YoY_Diff']:+.1f}"),
+        (text['stat_5y'], pct(k['5Y_Pct']), f"{k['5Y_Diff']:+.1f}"),
+        (text['stat_ath'], k['ATH'], f"{k['Drawdown']:+.1f}"),
+    ])
+    summary = _table(df.sort_values('Year', ascending=False), [
+        (text['col_year'], 'Year', '{:d}'), (text['col_ghpi'], 'GHPI', '{:.1f}'), (text['col_yoy'], 'YoY_Change', '{:.1f}%'),
+    ])
+    macro = _table(df_macro.sort_values('Year', ascending=False), [
+        (text['col_year'], 'Year', '{:d}'), ('GDP (€Bn)', 'GDP_Billion', '€ {:.0f} B'), ('Inflation', 'Inflation', '{:.1f}%'),
+        ('ASE', 'ASE_Index', '{:.0f}'), ('Trans.', 'Transactions_Thous', '{:.0f} k'), ('Permits', 'Permits_Thous', '{:.1f} k'),
+        ('FDI (RE)', 'FDI_RealEstate_M', '€ {:.0f} M'), ('Mortgages', 'Mortgages_New_M', '€ {:.0f} M'),
+    ])
+    services = ''.join(f'<div class="service"><div style="font-size:2rem">{icon}</div><h4>{e(text[f"s{i}_t"])}</h4>{e(text[f"s{i}_d"])}</div>'
+                       for i, icon in enumerate(ghpi_content.SERVICE_ICONS, start=1))
+    other = 'en' if lang == 'el' else 'el'
+
+    return f"""<!DOCTYPE html>
+<html lang="{lang}">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{e(text['title'])}</title>
+<meta name="description" content="{e(text['intro_text'])}">
+<meta name="ghpi-data-version" content="{ds.version}">
+{_links(lang)}
+<link rel="icon" href="/app/static/logo.png">
+<style>{_CSS}</style>
+<script src="{PLOTLY_JS}"></script>
+</head>
+<body>
+<header><img src="/app/static/logo.png" alt="GHPI"><div><h1>{e(text['title'])}</h1><div class="subtitle">{e(text['subtitle'])}</div></div></header>
+<p class="intro">{e(text['intro_text'])} · <a href="/">{'Διαδραστική έκδοση' if lang == 'el' else 'Interactive version'}</a> · <a href="/snapshot/{other}" hreflang="{other}">{other.upper()}</a></p>
+
+<section>
+<h2>{e(text['tab_data'])}</h2>
+<div class="kpis">{kpis}</div>
+<h3>{e(text['chart_compare_title'])}</h3>{_chart(figs['comp'], 'comp')}
+<h3>{e(text['chart_yoy_title'])}</h3>{_chart(figs['bar'], 'bar')}
+<h3>{e(text['table_title'])}</h3>{summary}
+</section>
+
+<section>
+<h2>{e(text['method_title'])}</h2>
+<h3>{e(text['meth_sec1_title'])}</h3>{_md(text['meth_sec1_body'])}
+<h3>{e(text['meth_sec3_title'])}</h3>{_md(text['meth_sec3_body'])}
+<p><strong>GHPI<sub>t</sub> = (0.5 × I<sub>Bank</sub>) + (0.3 × I<sub>Market</sub>) + (0.2 × I<sub>Cost</sub>)</strong></p>
+<h3>{e(text['meth_sec2_title'])}</h3>
+<h4>{e(text['meth_src1_t'])}</h4>{_md(text['meth_src1_d'])}
+<h4>{e(text['meth_src2_t'])}</h4>{_md(text['meth_src2_d'])}
+<h4>{e(text['meth_src3_t'])}</h4>{_md(text['meth_src3_d'])}
+<h3>{e(text['sources_title'])}</h3>
+<div class="source-box">{_md(text['source_1'])}{_md(text['source_2'])}{_md(text['source_3'])}</div>
+</section>
+
+<section>
+<h2>{e(text['tab_macro'])}</h2>
+<p><em>{e(text['macro_intro'])}</em></p>
+<h3>{e(text['macro_c1_title'])}</h3>{_chart(figs['macro1'], 'macro1')}
+<h3>{e(text['macro_c2_title'])}</h3>{_chart(figs['macro_act'], 'macro_act')}
+<h3>{e(text['macro_c3_title'])}</h3>{_chart(figs['macro_liq'], 'macro_liq')}
+<h3>{e(text['macro_c4_title'])}</h3>{_chart(figs['macro2'], 'macro2')}
+<h3>{e(text['macro_table_title'])}</h3>{macro}
+</section>
+
+<section>
+<h2>{e(text['hero_title'])}</h2>
+<p><strong>{e(text['hero_subtitle'])}</strong> · {e(text['hero_desc'])}</p>
+<h3>{e(text['services_main_title'])}</h3>
+<div class="services">{services}</div>
+<p style="text-align:center"><a href="https://www.giakoumakis.gr">{e(text['visit_button'])} 🌐</a></p>
+</section>
+<footer>{e(text['footer'])}</footer>
+</body>
+</html>
+"""
+
+
+# --- BUILD ---
+def _path(lang, version):
+    return os.path.join(SNAPSHOT_DIR, f'{lang}-{version}.html')
+
+
+def build(ds=None):
+    # Render every language for this data version; files of older versions are removed
+    ds = ds or ghpi_data.current()
+    with _build_lock:
+        os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+        paths = []
+        for lang in LANGS:
+            path = _path(lang, ds.version)
+            tmp = f'{path}.{os.getpid()}.tmp'
+            with open(tmp, 'w', encoding='utf-8') as f:
+                f.write(render(lang, ds))
+            os.replace(tmp, path)
+            paths.append(path)
+        for name in os.listdir(SNAPSHOT_DIR):
+            if name.endswith('.html') and os.path.join(SNAPSHOT_DIR, name) not in paths:
+                os.remove(os.path.join(SNAPSHOT_DIR, name))
+        return paths
+
+
+def snapshot_bytes(lang):
+    # Read under the build lock, so a concurrent build() for a newer version cannot remove
+    # the file between finding it and reading it
+    with _build_lock:
+        ds = ghpi_data.current()
+        path = _path(lang, ds.version)
+        if not os.path.exists(path):
+            build(ds)
+        with open(path, 'rb') as f:
+            return f.read()
+
+
+ghpi_data.on_refresh(build)
+
+
+# --- SERVING ---
+# A missing file is rendered on the spot (both languages), so it always happens in a
+# worker thread: never on the event loop that also carries the Streamlit websockets.
+def _body(lang, base, root):
+    return snapshot_bytes(lang).replace(_links(lang).encode(), _links(lang, base, root).encode(), 1)
+
+
+def _response(request, lang, root=False):
+    base = str(request.base_url).rstrip('/')
+    headers = {'Cache-Control': 'public, max-age=300'}
+    if root:  # "/" depends on who is asking
+        headers['Vary'] = 'User-Agent, Accept-Language'
+    return Response(_body(lang, base, root), media_type='text/html; charset=utf-8', headers=headers)
+
+
+def snapshot_endpoint(request):  # sync: run in Starlette's threadpool
+    lang = request.path_params['lang']
+    if lang not in LANGS:
+        return Response('Not found', status_code=404)
+    return _response(request, lang)
+
+
+routes = [Route('/snapshot/{lang}', snapshot_endpoint, methods=['GET', 'HEAD'])]
+
+
+class CrawlerSnapshotMiddleware:
+    # Bots asking for the app root get the static snapshot instead of the JS-only shell
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http' and scope['method'] in ('GET', 'HEAD') and scope['path'] == '/':
+            headers = {k.decode('latin-1').lower(): v.decode('latin-1') for k, v in scope['headers']}
+            if BOT_PATTERN.search(headers.get('user-agent', '')):
+                lang = 'el' if ghpi_lang.lang_from_accept_language(headers.get('accept-language')) == 'el' else 'en'
+                response = await run_in_threadpool(_response, Request(scope), lang, root=True)
+                await response(scope, receive, send)
+                return
+        await self.app(scope, receive, send)
+
+
+if __name__ == '__main__':
+    for built in build():
+        print(built)
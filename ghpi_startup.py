@@ -0,0 +1,104 @@
+import asyncio
+import contextlib
+import importlib
+import logging
+import os
+import time
+
+log = logging.getLogger(__name__)
+
+# --- SETTINGS ---
+WARMUP = os.environ.get('GHPI_WARMUP', '1') != '0'  # 0: leave every cache to the first visitors
+
+# --- COLD START ---
+# A fresh process would otherwise make its first visitor pay for the data load (plus the
+# refresh listeners: snapshots, analytics, forecast scheduling), the figures of their
+# language and Plotly's first validation / serialization of each trace type, whose
+# classes Plotly loads lazily. It also waits (up to GHPI_FORECAST_TIMEOUT) for the
+# background forecast fit, so the first Tab 1 already shows the projection.
+# ghpi_server runs warm_up() from the st.App lifespan hook: the socket is bound but no
+# connection is served until it is done. The hook first starts the forecast worker pool,
+# before any page run and off module import.
+# Imports the first paint does not need stay where they are used (requests in the geo-IP
+# worker of ghpi_lang). `python ghpi_startup.py` measures the imports in a fresh
+# interpreter, then each warm-up stage.
+IMPORTS = (
+    'pandas', 'pyarrow', 'plotly.graph_objects', 'plotly.io', 'plotly.tools', 'streamlit',
+    'ghpi_data', 'ghpi_analytics', 'ghpi_figures', 'ghpi_forecast', 'ghpi_exports', 'ghpi_api', 'ghpi_snapshot',
+)
+
+
+def import_times(modules=IMPORTS):
+    # Seconds per module, in order; each only counts what the earlier ones did not import
+    times = {}
+    for name in modules:
+        start = time.perf_counter()
+        importlib.import_module(name)
+        times[name] = time.perf_counter() - start
+    return times
+
+
+def _serialize(fig):
+    # What st.plotly_chart does with every figure: a validated copy, then JSON
+    import plotly.io
+    import plotly.tools
+    return plotly.io.to_json(plotly.tools.return_figure_from_figure_or_data(fig, validate_figure=True), validate=False)
+
+
+def warm_up():
+    # Fill the process-wide caches a page view reads; returns seconds per stage.
+    # Imported here so import_times() above measures a cold interpreter.
+    import ghpi_content
+    import ghpi_data
+    import ghpi_figures
+    import ghpi_forecast
+
+    stages = {}
+    start = time.perf_counter()
+
+    def lap(name):
+        nonlocal start
+        now = time.perf_counter()
+        stages[name] = now - start
+        start = now
+
+    ds = ghpi_data.current()
+    lap('data')
+    for lang, text in ghpi_content.CONTENT.items():
+        figs = ghpi_figures.get_figures(lang, text, ds)
+        lap(f'figures_{lang}')
+        for fig in figs.values():
+            _serialize(fig)
+        lap(f'serialize_{lang}')
+    ghpi_forecast.wait(ds)
+    lap('forecast')
+    return stages
+
+
+def _format(times):
+    return ', '.join(f'{name} {seconds * 1000:.0f} ms' for name, seconds in times.items())
+
+
+@contextlib.asynccontextmanager
+async def lifespan(app):
+    # st.App lifespan hook: warm up before serving; a failure only costs the warm start
+    import ghpi_forecast
+    await asyncio.to_thread(ghpi_forecast.start)
+    if WARMUP:
+        try:
+            stages = await asyncio.to_thread(warm_up)
+            log.info("GHPI warm-up done in %.2f s: %s", sum(stages.values()), _format(stages))
+        except Exception:
+            log.exception("GHPI warm-up failed; caches will fill on the first requests")
+    yield
+    ghpi_forecast.stop()
+
+
+if __name__ == '__main__':
+    imports = import_times()
+    print(f"imports  {sum(imports.values()):.2f} s: {_format(imports)}")
+    importlib.import_module('ghpi_forecast').start()
+    stages = warm_up()
+    print(f"warm-up  {sum(stages.values()):.2f} s: {_format(stages)}")
+    stages = warm_up()
+    print(f"again    {sum(stages.values()):.2f} s: {_format(stages)}")